@@ -0,0 +1,207 @@
+'''Benchmarks the conversion hot path & full builds on synthetic corpora, comparing each run against a stored baseline
+
+Run from the root directory with: ./bench.sh [--scale 0.1] [--save-baseline]
+'''
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from conversions import markdown_to_html_node, markdown_to_blocks, block_to_html_node, leaf_node_cache, textnode_cache
+from generation import generate_page
+from corpus import *
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(src_dir)
+
+def reset_caches():
+    '''Empties the inline caches, so that a repeat converts its text afresh rather than looking up the last repeat's
+    '''
+    textnode_cache.clear()
+    leaf_node_cache.clear()
+
+def best_of(repeat, func, setup=reset_caches):
+    '''Returns the fastest of repeat timings of func, in seconds, calling setup (untimed) before each
+    '''
+    timings = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def convert_all(documents):
+    return [markdown_to_html_node(md) for md in documents]
+
+def convert_blocks(md):
+    return [block_to_html_node(md_block) for md_block in markdown_to_blocks(md)]
+
+def render_all(nodes):
+    for node in nodes:
+        node.to_html()
+
+def generate_all(pages):
+    for page in pages:
+        generate_page(*page)
+
+def remove_outputs(out_dir):
+    '''Deletes a benchmark's output (& empties the inline caches), so that a repeat writes every page again rather
+    than leaving those whose html is unchanged untouched
+    '''
+    reset_caches()
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+def build(site_dir):
+    # each build is a fresh process, so that its startup is measured along with everything else, & renders every block afresh
+    subprocess.run([sys.executable, os.path.join(src_dir, 'main.py'), '--force', '--no-cache'], cwd=site_dir, check=True, stdout=subprocess.DEVNULL)
+
+def make_site(site_dir, kind, count, large_size):
+    write_corpus(os.path.join(site_dir, 'content'), kind, count, large_size=large_size)
+    os.makedirs(os.path.join(site_dir, 'static'))
+    with open(os.path.join(site_dir, 'static', 'styles.css'), 'w') as file:
+        file.write('body { margin: 0; }')
+    with open(os.path.join(root_dir, 'template.html')) as from_file, open(os.path.join(site_dir, 'template.html'), 'w') as to_file:
+        to_file.write(from_file.read())
+
+def memory_child(size):
+    '''Converts a markdown corpus of about size characters, printing the peak resident memory in MB
+
+    Run in a fresh process by measure_memory, so that nothing else contributes to the peak.
+    '''
+    import resource
+    md = document_of_size(random.Random(0), size)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    node = markdown_to_html_node(md)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is measured in kilobytes on Linux, but in bytes on macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    print(json.dumps({'peak': after * unit / (1 << 20), 'tree': (after - before) * unit / (1 << 20)}))
+
+def measure_memory(size):
+    '''Returns the (peak, tree) resident memory in MB of converting a markdown corpus of about size characters
+
+    tree is the growth of the peak while building the HTMLNode tree, excluding the markdown itself.
+    '''
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--memory-child', str(size)], check=True, capture_output=True, text=True).stdout
+    data = json.loads(output)
+    return data['peak'], data['tree']
+
+def run_benchmarks(scale, repeat, tmp):
+    '''Runs every benchmark, returning a dict mapping each benchmark's name to its best time in seconds
+    '''
+    rng = random.Random(0)
+    large_size = int((5 << 20) * min(scale, 1))
+    counts = {
+        'small': max(1, int(10000 * scale)),
+        'large': max(1, int(3 * scale)),
+        'links': max(1, int(20 * scale)),
+        'nested': max(1, int(200 * scale)),
+    }
+    documents = {
+        'small': [document(rng, rng.randint(3, 12)) for _ in range(counts['small'])],
+        'large': [document_of_size(rng, large_size) for _ in range(counts['large'])],
+        'links': [link_heavy_list(rng, 2000) for _ in range(counts['links'])],
+    }
+    results = {}
+    # the block pipeline alone, on a document of many short blocks of every type
+    block_heavy = document(rng, max(1, int(20000 * scale)))
+    results['block_to_html_node/block_heavy'] = best_of(repeat, lambda: convert_blocks(block_heavy))
+    for kind, docs in documents.items():
+        results[f'markdown_to_html_node/{kind}'] = best_of(repeat, lambda: convert_all(docs))
+        nodes = convert_all(docs)
+        results[f'to_html/{kind}'] = best_of(repeat, lambda: render_all(nodes))
+
+    # generate_page, on the small posts, with the standard template
+    pages = []
+    for i, md in enumerate(documents['small'][:1000]):
+        from_path = os.path.join(tmp, 'pages', f'{i}.md')
+        os.makedirs(os.path.dirname(from_path), exist_ok=True)
+        with open(from_path, 'w') as file:
+            file.write(md)
+        pages.append((from_path, os.path.join(root_dir, 'template.html'), os.path.join(tmp, 'out', str(i), 'index.html')))
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            results['generate_page/small'] = best_of(repeat, lambda: generate_all(pages), lambda: remove_outputs(os.path.join(tmp, 'out'))) / len(pages)
+        finally:
+            sys.stdout = stdout
+
+    for kind, count in counts.items():
+        site_dir = os.path.join(tmp, f'site-{kind}')
+        make_site(site_dir, kind, count, large_size)
+        results[f'build/{kind}'] = best_of(repeat, lambda: build(site_dir), lambda: remove_outputs(os.path.join(site_dir, 'docs')))
+
+    # peak memory of converting a 50 MB corpus, measured in MB rather than seconds
+    peak, tree = measure_memory(int((50 << 20) * scale))
+    results['peak_rss_mb/markdown_to_html_node'] = peak
+    results['tree_rss_mb/markdown_to_html_node'] = tree
+    return results
+
+def compare(results, baseline, tolerance):
+    '''Prints each result next to its baseline, returning the names of the benchmarks that regressed
+
+    Results are timings in seconds, or memory in MB; either way, larger is worse.
+    '''
+    regressions = []
+    print(f'{"benchmark":<36}{"result":>12}{"baseline":>12}{"change":>10}')
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f'{name:<36}{seconds:>12.4f}{"-":>12}{"-":>10}')
+            continue
+        change = seconds / baseline[name] - 1
+        flag = ''
+        if change > tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<36}{seconds:>12.4f}{baseline[name]:>12.4f}{change * 100:>9.1f}%{flag}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply the size of every corpus by this factor')
+    parser.add_argument('--repeat', type=int, default=3, help='Time each benchmark this many times, keeping the fastest')
+    parser.add_argument('--baseline', type=str, default=os.path.join(root_dir, 'bench_baseline.json'), help='Path of the stored baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results of this run as the new baseline')
+    parser.add_argument('--memory-child', type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Fraction slower than the baseline that counts as a regression')
+    args = parser.parse_args()
+    if args.memory_child is not None:
+        memory_child(args.memory_child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_benchmarks(args.scale, args.repeat, tmp)
+    baseline = {}
+    missing = None
+    if not os.path.exists(args.baseline):
+        missing = f'No baseline at {args.baseline}'
+    else:
+        with open(args.baseline) as file:
+            stored = json.load(file)
+        # baselines are only comparable with runs of the same scale
+        if stored.get('scale') == args.scale:
+            baseline = stored['results']
+        else:
+            missing = f'The baseline at {args.baseline} was recorded at scale {stored.get("scale")}, not {args.scale}'
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({'scale': args.scale, 'results': results}, file, indent=1)
+        print(f'Saved baseline to {args.baseline}')
+    elif missing is not None:
+        # timings are only meaningful on the machine they were taken on, so a baseline is recorded there rather than shipped;
+        # until it is, a run can't catch a regression, & says so rather than passing
+        print(f'{missing}, so no regression could be caught; run with --save-baseline on this machine to record one.', file=sys.stderr)
+        sys.exit(2)
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) regressed by more than {args.tolerance * 100:.0f}%: {", ".join(regressions)}')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+'''Compares the single-pass text_to_textnodes against the chained split_nodes_* passes it replaced
+
+Run from the root directory with: python3 src/bench_inline.py
+'''
+import timeit
+from textnode import *
+from conversions import *
+from conversions import _text_to_textnodes
+
+def text_to_textnodes_chained(text):
+    '''The original text_to_textnodes: one split_nodes_* pass over the whole text per kind of markdown
+    '''
+    old_nodes = [TextNode(text, TextType.TEXT)]
+    old_nodes = split_nodes_image(old_nodes)
+    old_nodes = split_nodes_link(old_nodes)
+    for delimiter, text_type in INLINE_DELIMITERS:
+        old_nodes = split_nodes_delimiter(old_nodes, delimiter, text_type)
+    return old_nodes
+
+def link_dense_text(count):
+    return ' '.join(f'see [link number {i}](https://example.com/{i}) and ![image {i}](/images/{i}.png)' for i in range(count))
+
+def emphasis_dense_text(count):
+    return ' '.join(f'some **bold {i}** then _italic_ and *more* with `code {i}`' for i in range(count))
+
+def bench(name, text, number):
+    # both must agree before their timings mean anything
+    assert _text_to_textnodes(text) == text_to_textnodes_chained(text)
+    # the parser itself is timed, rather than text_to_textnodes, whose inline cache would answer every repeat but the first
+    chained = min(timeit.repeat(lambda: text_to_textnodes_chained(text), number=number, repeat=3)) / number
+    single = min(timeit.repeat(lambda: _text_to_textnodes(text), number=number, repeat=3)) / number
+    print(f'{name:<24} {len(text):>9} chars   chained {chained * 1000:9.3f} ms   single-pass {single * 1000:9.3f} ms   {chained / single:6.1f}x')
+
+def main():
+    for count, number in [(10, 200), (100, 50), (1000, 5), (5000, 1)]:
+        bench(f'links x {count}', link_dense_text(count), number)
+    for count, number in [(10, 200), (100, 50), (1000, 5), (5000, 1)]:
+        bench(f'emphasis x {count}', emphasis_dense_text(count), number)
+
+if __name__ == '__main__':
+    main()
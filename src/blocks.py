@@ -0,0 +1,42 @@
+import re
+from enum import Enum
+
+class BlockType(Enum):
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    ULIST = "unordered_list"
+    OLIST = "ordered_list"
+
+# a heading is 1-6 '#' symbols followed by a space, within the first 7 characters of a block
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+
+def classify_block(md_block):
+    '''Dependent on expected markdown conventions, interprets the enum BlockType of a markdown block
+
+    Returns a (BlockType, lines) tuple, where lines is the block split at each newline, so that
+    the conversion of the block can reuse them rather than splitting the block again.
+    '''
+    lines = md_block.split('\n')
+    if HEADING_PATTERN.search(md_block, 0, 7):
+        return BlockType.HEADING, lines
+    if md_block.startswith("```") and md_block.endswith("```"):
+        return BlockType.CODE, lines
+    if all(line.startswith('>') for line in lines):
+        return BlockType.QUOTE, lines
+    if all(line.startswith('- ') for line in lines):
+        return BlockType.ULIST, lines
+    if md_block.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH, lines
+            i += 1
+        return BlockType.OLIST, lines
+    return BlockType.PARAGRAPH, lines
+
+def block_to_block_type(md_block):
+    '''Dependent on expected markdown conventions, interprets the enum BlockType of a markdown block
+    '''
+    return classify_block(md_block)[0]
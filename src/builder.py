@@ -0,0 +1,461 @@
+'''Builds whole sites, for use from the command line (see main.py) or from any long-lived process that builds sites back to back
+
+Everything a build depends on is passed in, rather than read from the command line or the current directory,
+so that one process may build many sites, keeping its compiled templates & inline caches warm between them.
+'''
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from conversions import leaf_node_cache
+from generation import *
+from manifest import *
+from watch import *
+from sync import *
+from profiling import *
+from rendercache import *
+from compress import precompress_dir, precompressed_outputs, SIDECAR_EXTENSIONS
+from minify import parse_minify
+from changes import record_changes, OUTPUTS_INDEX, CHANGES_NAME
+from search import SearchIndex, search_outputs, take_page_texts
+from pipeline import generate_pages_pipelined, IO_THREADS
+from contentindex import ContentIndex
+from lrucache import hit_rate
+
+def add_cache_stats(totals, stats):
+    '''Adds the (hits, misses) of each cache in stats to those in totals
+    '''
+    for name, (hits, misses) in stats.items():
+        total_hits, total_misses = totals.get(name, (0, 0))
+        totals[name] = (total_hits + hits, total_misses + misses)
+
+
+class Site:
+    """
+    A site to build: where its content, static files, & default template are, where it's built to, & how
+
+    ...
+
+    Attributes
+    ----------
+    content_dir : str
+        the directory of 'index.md' files (& any 'template.html' files specific to them) to generate pages from
+    static_dir : str
+        the directory of static files to copy alongside the pages
+    out_dir : str
+        the directory the site is built into
+    template : str
+        the path of the default template, used by every page without a 'template.html' of its own
+    basepath : str
+        the path root-relative links & images are made relative to
+    pretty : bool
+        whether or not pages are pretty printed
+    stream : bool
+        whether or not pages are converted & written one markdown block at a time
+    hash_static : bool
+        whether static files are compared by content hash, rather than by size & modification time
+    link_static : bool
+        whether static files are hard linked into out_dir, rather than copied, where possible
+    minify : Minify
+        the options pages & their templates are minified with, or None if they aren't
+    precompress : str[]
+        the compressions (e.g. 'gz') to write a sidecar of each compressible output file in, if any
+    search : bool
+        whether or not the text of every page is indexed for search, into out_dir's 'search' directory
+    search_index : SearchIndex
+        the search index loaded from out_dir as the build was prepared, or None if pages aren't indexed
+    render_cache : RenderCache
+        the cache of the html rendered for each block between builds, or None if blocks are always rendered
+    index : ContentIndex
+        the pages & templates found in content_dir by the last call to find_pages
+
+    Methods
+    -------
+    build(jobs, force, profiler, executor, clear_cache, io_threads)
+        Builds the site, returning a summary of what was done
+    watch(port)
+        Serves out_dir, rebuilding whatever is affected by each change to the site's files
+    """
+
+    def __init__(self, content_dir, static_dir, out_dir, template, basepath='/', pretty=False, stream=False,
+                 hash_static=False, link_static=False, cache_dir=None, cache_size=DEFAULT_CACHE_SIZE, minify=None, precompress=(), search=False):
+        if pretty and minify is not None:
+            raise ValueError("Pages can't be both pretty printed & minified")
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.out_dir = os.path.abspath(out_dir)
+        self.template = os.path.abspath(template)
+        self.basepath = basepath
+        self.pretty = pretty
+        self.stream = stream
+        self.hash_static = hash_static
+        self.link_static = link_static
+        self.minify = minify
+        self.precompress = tuple(precompress)
+        self.search = search
+        # pages recorded in the manifest are only reused if they were built with the same options
+        self.options = {'basepath': basepath, 'pretty': pretty, 'minify': None if minify is None else minify._asdict(), 'search': search}
+        self.render_cache = None if cache_dir is None else RenderCache(cache_dir, self.options, max_bytes=cache_size)
+        self.index = None
+        self.search_index = None
+
+    def page_for(self, path):
+        '''Returns the (markdown path, template path, generation path) tuple for the 'index.md' file at path
+        '''
+        if self.index is None:
+            self.index = ContentIndex(self.content_dir, self.template)
+        # the nearest 'template.html' at or above the page is used in lieu of the default template
+        template = self.index.template_for(path)
+        # set a generation path for 'index.html' in the out directory that mirrors 'index.md' seen in the content directory
+        relpath = os.path.dirname(path).replace(self.content_dir, '').lstrip('/')
+        generation_path = os.path.join(self.out_dir, relpath, 'index.html')
+        return (path, template, generation_path)
+
+    def find_pages(self):
+        '''Finds every page to generate within the content directory, indexing it afresh
+
+        Returns a list of (markdown path, template path, generation path) tuples.
+        '''
+        self.index = ContentIndex(self.content_dir, self.template)
+        return [self.page_for(path) for path in self.index.pages]
+
+    def page_job(self, page):
+        '''Returns the arguments of generate_page for the given page tuple
+        '''
+        return PageJob(*page, self.basepath, self.pretty, self.stream, self.render_cache, self.minify, self.search)
+
+    def stale_pages(self, manifest=None):
+        '''Returns the page tuples of every page whose inputs changed since it was recorded in manifest (or of every page, without one)
+        '''
+        pages = self.find_pages()
+        if manifest is not None:
+            # the manifest reuses the hashes of sources & templates whose size & modification time haven't changed
+            manifest.file_stats = self.index.stats
+            pages = [page for page in pages if not manifest.is_current(*page)]
+        return pages
+
+    def prepare(self, force=False, clear_cache=False, profiler=None):
+        '''Loads the site's build manifest & syncs its static files, returning the manifest & the (copied, deleted, unchanged) counts
+        '''
+        if profiler is None:
+            profiler = Profiler(enabled=False)
+        manifest = BuildManifest.load(os.path.join(self.out_dir, MANIFEST_NAME), self.options)
+        if force:
+            manifest.invalidate()
+        if clear_cache and self.render_cache is not None:
+            print(f'Clearing the render cache at {omit_cd(self.render_cache.directory)}...')
+            self.render_cache.clear()
+        # copy only new or changed static files, deleting any orphans besides the pages (& sidecars) generated by previous builds
+        keep = manifest.outputs() | {OUTPUTS_INDEX, CHANGES_NAME}
+        if self.precompress:
+            keep |= precompressed_outputs(self.out_dir)
+        if self.search:
+            self.search_index = SearchIndex.load(self.out_dir, self.basepath)
+            if self.search_index.is_empty():
+                # pages that are current were never indexed, so every page is generated (& indexed) afresh
+                self.search_index.clear()
+                manifest.invalidate()
+            keep |= search_outputs(self.out_dir)
+        print(f'Syncing contents of {omit_cd(self.static_dir)} to {omit_cd(self.out_dir)}...')
+        with profiler.phase('static copy'):
+            static = sync_dir(self.static_dir, self.out_dir, keep=keep, use_hash=self.hash_static, link=self.link_static)
+        print(f'Copied {static[0]}, deleted {static[1]}, & kept {static[2]} unchanged static file(s).')
+        if self.pretty:
+            print(f'Using pretty printing...')
+        if self.minify is not None:
+            print(f'Minifying pages...')
+        return manifest, static
+
+    def finish(self, manifest, generated, cache_stats, static, jobs=1, profiler=None, written=None, page_texts=None):
+        '''Reports on & prunes the caches & the manifest once the site's pages are generated, indexes the text of the pages
+        generated (as returned by take_page_texts) for search, writes any precompressed sidecars, & records which output files the build changed
+
+        Returns a summary of the build.
+        '''
+        if profiler is None:
+            profiler = Profiler(enabled=False)
+        for name, (hits, misses) in cache_stats.items():
+            if hits + misses > 0:
+                print(f'Cache ({name}): {hit_rate(hits, misses):.1f}% of {hits + misses} lookup(s) hit.')
+        evicted = 0
+        if self.render_cache is not None:
+            evicted = self.render_cache.prune()
+            if evicted > 0:
+                print(f'Evicted the cached html of {evicted} page(s) from the render cache.')
+        if written is None:
+            written = generated
+        if generated > written:
+            print(f'Wrote {written} page(s), leaving {generated - written} whose html was unchanged untouched.')
+        if manifest.reused > 0:
+            print(f'Skipped {manifest.reused} page(s) whose inputs are unchanged since the last build.')
+        for removed_path in manifest.prune():
+            print(f'Removed {omit_cd(removed_path)}, as its source no longer exists.')
+        indexed = None
+        if self.search:
+            with profiler.phase('search index'):
+                indexed = self.search_index.update(page_texts or {}, manifest.pages)
+            print(f'Indexed {indexed[0]} page(s) for search & removed {indexed[1]}, updating {indexed[2]} shard(s).')
+        precompressed = (0, 0, 0)
+        if self.precompress:
+            with profiler.phase('precompress'):
+                precompressed = precompress_dir(self.out_dir, self.precompress)
+            print(f'Precompressed {precompressed[0]} file(s) ({", ".join(self.precompress)}), skipped {precompressed[1]} unchanged, & removed {precompressed[2]} stale sidecar(s).')
+        with profiler.phase('changes'):
+            changes = record_changes(self.out_dir, jobs=jobs)
+        changed = tuple(len(changes[kind]) for kind in ('added', 'modified', 'deleted'))
+        print(f'Recorded {changed[0]} added, {changed[1]} modified, & {changed[2]} deleted output file(s) in {omit_cd(os.path.join(self.out_dir, CHANGES_NAME))}.')
+        manifest.save()
+        return {'generated': generated, 'written': written, 'unchanged': generated - written, 'skipped': manifest.reused, 'static': static, 'cache_stats': cache_stats, 'evicted': evicted, 'search': indexed, 'precompressed': precompressed, 'changes': changed}
+
+    def build(self, jobs=1, force=False, profiler=None, executor=None, clear_cache=False, io_threads=IO_THREADS):
+        '''Builds the site, generating only the pages whose inputs changed since the last build unless force is True
+
+        Returns a dict summarizing the build: the number of pages generated & skipped, the number of those generated that were
+        written & that were left unchanged, the (copied, deleted, unchanged)
+        counts of static files, the {cache name: (hits, misses)} of the caches, the number of pages evicted from the render cache,
+        the (indexed, removed, shards written) counts of the search index (or None, if pages aren't indexed), the (written, skipped, removed) counts of precompressed sidecars, & the (added, modified, deleted) counts of output files.
+        '''
+        return build_sites([self], jobs=jobs, force=force, profiler=profiler, executor=executor, clear_cache=clear_cache, io_threads=io_threads)[0]
+
+    def rebuild_changed(self, changed, deleted, manifest, pages):
+        '''Regenerates only the pages & static files affected by the given changed and deleted paths
+
+        pages is a dict mapping the markdown path of every page in the content directory to its page tuple,
+        and is kept up to date as pages are added or deleted.
+        '''
+        to_generate = set()
+        for path in changed + deleted:
+            if path.startswith(self.static_dir + os.sep):
+                # static files map directly onto the out directory
+                to_path = os.path.join(self.out_dir, os.path.relpath(path, self.static_dir))
+                if path in changed:
+                    print(f'Copying {omit_cd(path)} to {omit_cd(to_path)}...')
+                    os.makedirs(os.path.dirname(to_path), exist_ok=True)
+                    copy_file(path, to_path, link=self.link_static)
+                elif os.path.isfile(to_path):
+                    print(f'Removing {omit_cd(to_path)}...')
+                    os.remove(to_path)
+            elif path.endswith('index.md'):
+                pages.pop(path, None)
+                if path in changed:
+                    pages[path] = self.page_for(path)
+                    to_generate.add(path)
+                else:
+                    generation_path = self.page_for(path)[2]
+                    print(f'Removing {omit_cd(generation_path)}, as its source no longer exists...')
+                    manifest.discard(generation_path)
+            elif path.endswith('template.html'):
+                # a template may have been created or deleted, so the content is indexed again & the template of each page resolved again
+                if path.startswith(self.content_dir + os.sep):
+                    self.index = ContentIndex(self.content_dir, self.template)
+                for md_path in pages:
+                    template = pages[md_path][1]
+                    pages[md_path] = self.page_for(md_path)
+                    if pages[md_path][1] == path or pages[md_path][1] != template:
+                        to_generate.add(md_path)
+        for md_path in sorted(to_generate):
+            generate_page(*self.page_job(pages[md_path]))
+            manifest.record(*pages[md_path])
+        if self.search:
+            self.search_index.update(take_page_texts(), manifest.pages)
+        if self.precompress:
+            precompress_dir(self.out_dir, self.precompress)
+        manifest.save()
+
+    def watch(self, port=8888):
+        '''Serves the out directory, regenerating pages & copying static files as the files they depend on change
+        '''
+        manifest = BuildManifest.load(os.path.join(self.out_dir, MANIFEST_NAME), self.options)
+        if self.search:
+            self.search_index = SearchIndex.load(self.out_dir, self.basepath)
+        pages = {page[0]: page for page in self.find_pages()}
+        serve(self.out_dir, port=port)
+        print(f'Serving {omit_cd(self.out_dir)} at http://localhost:{port}/; watching for changes...')
+
+        def on_change(changed, deleted):
+            start = time.perf_counter()
+            try:
+                self.rebuild_changed(changed, deleted, manifest, pages)
+            except Exception as e:
+                # a half-written markdown file shouldn't bring down the server; it will be rebuilt once it is saved again
+                print(f'Rebuild failed: {e}')
+                return
+            print(f'Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms.')
+
+        watch([self.content_dir, self.static_dir, self.template], on_change)
+
+
+def generate_all(work, jobs=1, profiler=None, executor=None, io_threads=IO_THREADS):
+    '''Generates the pages of several sites, given as a list of (site, manifest, pages) tuples, in order
+
+    If jobs is greater than 1, pages are generated in that many worker processes, or in those of executor if given
+    (a ProcessPoolExecutor whose workers were initialized with init_worker). The pages of every site are handed to the
+    same workers, so that none sit idle between the end of one site & the start of the next.
+    Otherwise, pages are read & written on io_threads threads while others are rendered (unless io_threads is 0, or the build
+    is being profiled, as the profiler times the phases of one thread at a time).
+    Each page generated is recorded in its site's manifest, & its time in the profiler, if given.
+    Returns the {cache name: (hits, misses)} of the caches over the pages of each site, the number of its pages written
+    (rather than left untouched, as they were unchanged), & the text of its pages indexed for search (as returned by take_page_texts),
+    as a (cache stats, written, page texts) tuple for each site in the same order as work.
+    '''
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+    cache_stats = [{} for _ in work]
+    written = [0] * len(work)
+    page_texts = [{} for _ in work]
+    page_jobs = [(i, page, site.page_job(page)) for i, (site, manifest, pages) in enumerate(work) for page in pages]
+    if jobs > 1 and len(page_jobs) > 1:
+        # hand each worker several pages at a time, so that thousands of small pages aren't dominated by messaging
+        chunksize = max(1, len(page_jobs) // (jobs * 4))
+        own_executor = None
+        if executor is None:
+            own_executor = executor = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(profiler.enabled, leaf_node_cache.maxsize))
+        try:
+            results = executor.map(generate_page_quietly, [page_job for i, page, page_job in page_jobs], chunksize=chunksize)
+            # results arrive in the order pages were found, so logs read the same as a serial build
+            for (i, page, page_job), (log, profile, page_cache_stats, page_written, page_text) in zip(page_jobs, results):
+                print(log, end='')
+                if profile is not None:
+                    profiler.merge(profile)
+                add_cache_stats(cache_stats[i], page_cache_stats)
+                written[i] += page_written
+                page_texts[i].update(page_text)
+                work[i][1].record(*page)
+        finally:
+            if own_executor is not None:
+                own_executor.shutdown()
+        return list(zip(cache_stats, written, page_texts))
+    for i, (site, manifest, pages) in enumerate(work):
+        take_cache_stats()
+        take_page_texts()
+        if io_threads > 0 and not profiler.enabled:
+            for page_job, page_written in generate_pages_pipelined(map(site.page_job, pages), threads=io_threads):
+                manifest.record(*page_job[:3])
+                written[i] += page_written
+        else:
+            for page in pages:
+                with profiler.page(omit_cd(page[0])):
+                    written[i] += generate_page(*site.page_job(page))
+                manifest.record(*page)
+        add_cache_stats(cache_stats[i], take_cache_stats())
+        page_texts[i] = take_page_texts()
+    return list(zip(cache_stats, written, page_texts))
+
+def build_sites(sites, jobs=1, force=False, profiler=None, executor=None, clear_cache=False, io_threads=IO_THREADS):
+    '''Builds several sites in one process, returning the summary of each (as returned by Site.build), in the same order as sites
+
+    The pages of all the sites share one pool of worker processes, & their compiled templates & inline caches.
+    Sites are scheduled largest first (by the size of the markdown to generate), so that the largest doesn't start last
+    & leave the other workers idle while it finishes.
+    '''
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+    prepared = []
+    for site in sites:
+        manifest, static = site.prepare(force=force, clear_cache=clear_cache, profiler=profiler)
+        pages = site.stale_pages(manifest)
+        prepared.append((site, manifest, static, pages))
+    order = sorted(range(len(prepared)), key=lambda i: sum(os.path.getsize(page[0]) for page in prepared[i][3]), reverse=True)
+    work = [(prepared[i][0], prepared[i][1], prepared[i][3]) for i in order]
+    # find all 'index.md' and relevant 'template.html' files in each content directory and generate 'index.html' files within each out directory
+    profiler.install()
+    try:
+        results = generate_all(work, jobs=jobs, profiler=profiler, executor=executor, io_threads=io_threads)
+    finally:
+        profiler.uninstall()
+    summaries = [None] * len(sites)
+    for i, (site_cache_stats, written, page_texts) in zip(order, results):
+        site, manifest, static, pages = prepared[i]
+        summaries[i] = site.finish(manifest, len(pages), site_cache_stats, static, jobs=jobs, profiler=profiler, written=written, page_texts=page_texts)
+    return summaries
+
+def site_at(root, **options):
+    '''Returns the Site laid out in the conventional way within the root directory
+
+    That is, with its content in 'content', static files in 'static', & default template at 'template.html',
+    built into 'docs', & its render cache in '.cache/render' (unless cache is False).
+    '''
+    cache = options.pop('cache', True)
+    return Site(
+        os.path.join(root, 'content'),
+        os.path.join(root, 'static'),
+        os.path.join(root, 'docs'),
+        os.path.join(root, 'template.html'),
+        cache_dir=os.path.join(root, '.cache', 'render') if cache else None,
+        **options,
+    )
+
+# the options a site in a batch file may give, & the JSON type of each ("minify" & "precompress" are lists of names,
+# & "cache_size" is in megabytes, as --cache-size is)
+BATCH_OPTIONS = {
+    'basepath': str, 'pretty': bool, 'stream': bool, 'hash_static': bool, 'link_static': bool,
+    'cache': bool, 'cache_size': int, 'minify': list, 'precompress': list, 'search': bool,
+}
+
+def batch_option(key, value):
+    '''Returns the Site option for the value a batch file gives key, raising a ValueError if it isn't one
+    '''
+    if key not in BATCH_OPTIONS:
+        raise ValueError(f'unknown option "{key}"; expected "root" or one of {", ".join(BATCH_OPTIONS)}')
+    if key == 'minify' and value is None:
+        return None
+    # bools are ints to isinstance, so types are compared exactly
+    if type(value) is not BATCH_OPTIONS[key] or isinstance(value, list) and not all(type(name) is str for name in value):
+        raise ValueError(f'"{key}" must be a {"list of names" if BATCH_OPTIONS[key] is list else BATCH_OPTIONS[key].__name__}, not {json.dumps(value)}')
+    if key == 'minify':
+        return parse_minify(value)
+    if key == 'cache_size':
+        return value << 20
+    if key == 'precompress':
+        unknown = [name for name in value if name not in SIDECAR_EXTENSIONS]
+        if unknown:
+            raise ValueError(f'unknown compression "{unknown[0]}"; expected one of {", ".join(SIDECAR_EXTENSIONS)}')
+    return value
+
+def read_batch(path):
+    '''Returns the sites listed in the batch file at path, as a list of (root directory, options) tuples
+
+    The file holds a JSON list of sites, each an object with the site's "root" directory (relative to the batch file)
+    & optionally any of BATCH_OPTIONS, e.g. "basepath", "pretty", or "minify" (a list of extras, or null to build it unminified).
+    Raises a ValueError naming the problem if the file can't be read, or lists a site that isn't valid.
+    '''
+    try:
+        with open(path) as file:
+            entries = json.load(file)
+    except OSError as e:
+        raise ValueError(f'Can\'t read the batch file "{path}": {e.strerror}')
+    except ValueError as e:
+        raise ValueError(f'The batch file "{path}" isn\'t valid JSON: {e}')
+    if not isinstance(entries, list):
+        raise ValueError(f'The batch file "{path}" must hold a list of sites')
+    batch_dir = os.path.dirname(os.path.abspath(path))
+    sites = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or type(entry.get('root')) is not str:
+            raise ValueError(f'Site {i} of "{path}" must be an object with a "root" directory')
+        try:
+            options = {key: batch_option(key, value) for key, value in entry.items() if key != 'root'}
+        except ValueError as e:
+            raise ValueError(f'Site {i} ("{entry["root"]}") of "{path}": {e}')
+        sites.append((os.path.join(batch_dir, entry['root']), options))
+    return sites
+
+def load_batch(path, **defaults):
+    '''Returns the Sites listed in the batch file at path (see read_batch); any option a site doesn't give takes its value from defaults
+    '''
+    return [site_at(root, **{**defaults, **options}) for root, options in read_batch(path)]
+
+def build_site(content_dir, static_dir, out_dir, template, basepath='/', pretty=False, jobs=1, force=False, stream=False,
+               hash_static=False, link_static=False, cache_dir=None, cache_size=DEFAULT_CACHE_SIZE, clear_cache=False,
+               minify=None, precompress=(), search=False, io_threads=IO_THREADS, profiler=None, executor=None):
+    '''Builds the site of the given directories & default template into out_dir, returning a summary of the build
+
+    See Site for the meaning of each option, & Site.build for the summary returned. The render cache is only used if
+    a cache_dir is given. Compiled templates & the inline caches are kept in memory, so that building many sites
+    back to back in one process reuses them.
+    '''
+    site = Site(content_dir, static_dir, out_dir, template, basepath=basepath, pretty=pretty, stream=stream,
+                hash_static=hash_static, link_static=link_static, cache_dir=cache_dir, cache_size=cache_size, minify=minify,
+                precompress=precompress, search=search)
+    return site.build(jobs=jobs, force=force, profiler=profiler, executor=executor, clear_cache=clear_cache, io_threads=io_threads)
@@ -0,0 +1,143 @@
+'''Records which output files each build added, modified, & deleted, so that a deploy pushes (& purges) only those
+
+After every build the out directory is compared with a snapshot of it taken after the last one. Files are told apart by
+their hash, so a page that was regenerated with the same html (& so left untouched) isn't reported as modified.
+'''
+import os
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file, MANIFEST_NAME
+from compress import PRECOMPRESS_INDEX
+from search import SEARCH_STATE
+
+# the snapshot of the out directory as of the last build
+OUTPUTS_INDEX = '.outputs'
+# the changes made by the last build, for deploy tooling to read
+CHANGES_NAME = '.changes.json'
+CHANGES_VERSION = 1
+# the generator's own records, which are never deployed (unlike other dotfiles, e.g. '.nojekyll')
+BOOKKEEPING_FILES = frozenset([MANIFEST_NAME, PRECOMPRESS_INDEX, SEARCH_STATE, OUTPUTS_INDEX, CHANGES_NAME])
+
+def load_outputs(directory):
+    '''Returns the snapshot of directory taken by the last record_changes: a dict mapping the path of each file,
+    relative to directory & separated by '/', to its [mtime in ns, size, hash]
+    '''
+    try:
+        with open(os.path.join(directory, OUTPUTS_INDEX)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def scan_outputs(directory, previous=None, jobs=1):
+    '''Returns a snapshot of every file within directory (besides the generator's bookkeeping), as load_outputs does
+
+    The hashes of files whose size & modification time match the previous snapshot are reused rather than read again;
+    the rest are hashed on jobs threads at once.
+    '''
+    if previous is None:
+        previous = {}
+    outputs = {}
+    to_hash = []
+
+    def scan(dir_path, prefix):
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir():
+                    scan(entry.path, rel_path + '/')
+                elif not (prefix == '' and entry.name in BOOKKEEPING_FILES):
+                    stat = entry.stat()
+                    stamp = previous.get(rel_path)
+                    if stamp is not None and stamp[:2] == [stat.st_mtime_ns, stat.st_size]:
+                        outputs[rel_path] = stamp
+                    else:
+                        outputs[rel_path] = [stat.st_mtime_ns, stat.st_size, None]
+                        to_hash.append((rel_path, entry.path))
+
+    scan(directory, '')
+    # hashlib releases the GIL while it hashes, so threads hash several files at once
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        for (rel_path, path), file_hash in zip(to_hash, executor.map(hash_file, [path for rel_path, path in to_hash])):
+            outputs[rel_path][2] = file_hash
+    return outputs
+
+def diff_outputs(old, new):
+    '''Returns the changes between two snapshots, as a dict of 'added', 'modified', & 'deleted' dicts, each mapping
+    the path of a file to its hash (the hash it had, for deleted files)
+    '''
+    changes = {'added': {}, 'modified': {}, 'deleted': {}}
+    for rel_path, (mtime, size, file_hash) in new.items():
+        if rel_path not in old:
+            changes['added'][rel_path] = file_hash
+        elif old[rel_path][2] != file_hash:
+            changes['modified'][rel_path] = file_hash
+    for rel_path, (mtime, size, file_hash) in old.items():
+        if rel_path not in new:
+            changes['deleted'][rel_path] = file_hash
+    return changes
+
+def record_changes(directory, jobs=1):
+    '''Compares directory with its snapshot from the last build, writing the changes to its CHANGES_NAME & taking a new snapshot
+
+    Returns the changes, as diff_outputs does.
+    '''
+    previous = load_outputs(directory)
+    outputs = scan_outputs(directory, previous, jobs=jobs)
+    changes = diff_outputs(previous, outputs)
+    with open(os.path.join(directory, CHANGES_NAME), 'w') as file:
+        json.dump({'version': CHANGES_VERSION, **changes}, file, indent=1, sort_keys=True)
+    with open(os.path.join(directory, OUTPUTS_INDEX), 'w') as file:
+        # dumped as one string, by the C encoder, rather than streamed to the file a piece at a time
+        file.write(json.dumps(outputs, sort_keys=True))
+    return changes
+
+def load_changes(directory):
+    '''Returns the changes recorded by the last build of directory, as diff_outputs does
+
+    Raises a ValueError if there are none, or they were recorded in another format.
+    '''
+    try:
+        with open(os.path.join(directory, CHANGES_NAME)) as file:
+            data = json.load(file)
+    except (OSError, ValueError) as e:
+        raise ValueError(f'No changes recorded in "{directory}": {e}')
+    if data.get('version') != CHANGES_VERSION:
+        raise ValueError(f'The changes recorded in "{directory}" are in an unknown format (version {data.get("version")})')
+    return {kind: data[kind] for kind in ('added', 'modified', 'deleted')}
+
+def apply_changes(from_dir, to_dir, changes=None):
+    '''Applies the changes recorded by the last build of from_dir to to_dir, a copy of from_dir as of the build before it
+
+    to_dir stands in for wherever the site is deployed (e.g. an object store): the files added & modified are copied
+    into it, each replacing the old one at once, & the files deleted are removed, along with any directories left empty.
+    Raises a ValueError if a file to copy no longer has the hash recorded for it, as from_dir changed since the build.
+    Returns a (copied, deleted) tuple of the number of files affected.
+    '''
+    if changes is None:
+        changes = load_changes(from_dir)
+    copied = deleted = 0
+    for kind in ('added', 'modified'):
+        for rel_path, file_hash in sorted(changes[kind].items()):
+            from_path = os.path.join(from_dir, *rel_path.split('/'))
+            if not os.path.isfile(from_path) or hash_file(from_path) != file_hash:
+                raise ValueError(f'"{rel_path}" changed since its build recorded it; rebuild before applying the changes')
+            to_path = os.path.join(to_dir, *rel_path.split('/'))
+            os.makedirs(os.path.dirname(to_path), exist_ok=True)
+            temp_path = to_path + '.tmp'
+            shutil.copyfile(from_path, temp_path)
+            os.replace(temp_path, to_path)
+            copied += 1
+    for rel_path in sorted(changes['deleted']):
+        to_path = os.path.join(to_dir, *rel_path.split('/'))
+        if not os.path.isfile(to_path):
+            continue
+        os.remove(to_path)
+        deleted += 1
+        # clean up any directories left empty by the deletion, without leaving to_dir
+        dir_path = os.path.dirname(to_path)
+        while os.path.normpath(dir_path) != os.path.normpath(to_dir) and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+            dir_path = os.path.dirname(dir_path)
+    return copied, deleted
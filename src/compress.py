@@ -0,0 +1,120 @@
+'''Writes precompressed sidecars (e.g. 'styles.css.gz') of the compressible files of a built site, for static servers to serve as they are
+'''
+import os
+import gzip
+import json
+import lzma
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import hash_file
+
+PRECOMPRESS_INDEX = '.precompressed'
+# the extension of the sidecar written in each format
+SIDECAR_EXTENSIONS = {'gz': '.gz', 'xz': '.xz'}
+COMPRESSIBLE_EXTENSIONS = frozenset(['.html', '.css', '.js', '.mjs', '.svg', '.json', '.xml', '.txt', '.map'])
+# files smaller than this gain too little from compression to be worth a sidecar
+MIN_SIZE = 256
+# threads compressing files at once; compression is bound by the CPU, & independent of the processes rendering pages
+COMPRESS_THREADS = os.cpu_count() or 1
+
+def compress_bytes(data, compression):
+    if compression == 'gz':
+        # a fixed mtime, so that the same file always compresses to the same bytes
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if compression == 'xz':
+        return lzma.compress(data, preset=9)
+    raise ValueError(f'Unknown compression "{compression}"; expected one of {", ".join(SIDECAR_EXTENSIONS)}')
+
+def compress_file(path, compressions):
+    '''Writes a sidecar of the file at path in each of the given compressions, returning the extensions of those written
+
+    A sidecar is only kept if it's smaller than the file itself.
+    '''
+    with open(path, 'rb') as file:
+        data = file.read()
+    written = []
+    for compression in compressions:
+        sidecar_path = path + SIDECAR_EXTENSIONS[compression]
+        compressed = compress_bytes(data, compression)
+        if len(compressed) >= len(data):
+            if os.path.exists(sidecar_path):
+                os.remove(sidecar_path)
+            continue
+        # written whole & then renamed, so that a server never sends a torn sidecar
+        temp_path = sidecar_path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(compressed)
+        os.replace(temp_path, sidecar_path)
+        written.append(SIDECAR_EXTENSIONS[compression])
+    return written
+
+def load_index(directory):
+    '''Returns what the last precompress_dir of directory compressed
+
+    That is, a dict mapping the relative path of each file to a [hash, sidecar extensions written, sidecar extensions requested] list.
+    '''
+    try:
+        with open(os.path.join(directory, PRECOMPRESS_INDEX)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def precompressed_outputs(directory):
+    '''Returns the relative paths of every sidecar written by precompress_dir within directory, along with its index
+    '''
+    outputs = {PRECOMPRESS_INDEX}
+    for rel_path, (file_hash, written, requested) in load_index(directory).items():
+        outputs.update(rel_path + extension for extension in written)
+    return outputs
+
+def precompress_dir(directory, compressions=('gz',), threads=COMPRESS_THREADS, min_size=MIN_SIZE):
+    '''Writes sidecars of every compressible file within directory, in threads threads at once
+
+    Files whose hash & requested compressions are the same as when they were last compressed are skipped,
+    and the sidecars of files that were deleted (or have become too small) are removed, along with any directories left empty.
+    Returns a (written, skipped, removed) tuple of the number of files affected.
+    '''
+    for compression in compressions:
+        if compression not in SIDECAR_EXTENSIONS:
+            raise ValueError(f'Unknown compression "{compression}"; expected one of {", ".join(SIDECAR_EXTENSIONS)}')
+    extensions = sorted(SIDECAR_EXTENSIONS[compression] for compression in compressions)
+    index = load_index(directory)
+    new_index = {}
+    to_compress = []
+    skipped = 0
+    for dir_path, dir_names, file_names in os.walk(directory):
+        for name in file_names:
+            if name.startswith('.') or os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(dir_path, name)
+            if os.path.getsize(path) < min_size:
+                continue
+            rel_path = os.path.relpath(path, directory)
+            file_hash = hash_file(path)
+            previous = index.get(rel_path)
+            if previous is not None and previous[0] == file_hash and previous[2] == extensions:
+                new_index[rel_path] = previous
+                skipped += 1
+            else:
+                to_compress.append((rel_path, path, file_hash))
+    # zlib & lzma release the GIL while they compress, so threads compress several files at once
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        results = executor.map(lambda job: compress_file(job[1], compressions), to_compress)
+        for (rel_path, path, file_hash), written in zip(to_compress, results):
+            new_index[rel_path] = [file_hash, written, extensions]
+    removed = 0
+    for rel_path, entry in index.items():
+        stale = set(entry[1]) - set(new_index.get(rel_path, [None, []])[1])
+        for extension in stale:
+            sidecar_path = os.path.join(directory, rel_path + extension)
+            if os.path.exists(sidecar_path):
+                os.remove(sidecar_path)
+                removed += 1
+                # the sidecars of a deleted page outlive the page, so the directories it left are cleaned up now
+                dir_path = os.path.dirname(sidecar_path)
+                while os.path.normpath(dir_path) != os.path.normpath(directory) and not os.listdir(dir_path):
+                    os.rmdir(dir_path)
+                    dir_path = os.path.dirname(dir_path)
+    with open(os.path.join(directory, PRECOMPRESS_INDEX), 'w') as file:
+        json.dump(new_index, file, indent=1, sort_keys=True)
+    return len(to_compress), skipped, removed
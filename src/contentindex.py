@@ -0,0 +1,73 @@
+'''Indexes the pages & templates of a content directory in a single walk, resolving the template of each page from it
+'''
+import os
+
+PAGE_NAME = 'index.md'
+TEMPLATE_NAME = 'template.html'
+
+class ContentIndex:
+    """
+    Every page & template within a content directory, found in one walk of it with os.scandir
+
+    ...
+
+    Attributes
+    ----------
+    root : str
+        the content directory
+    default_template : str
+        the template of every page without a 'template.html' in its directory or any directory above it, up to root
+    pages : str[]
+        the path of every 'index.md' file, in the order they were found
+    templates : dict
+        maps each directory with a 'template.html' file to the path of that file
+    stats : dict
+        maps the path of every page & template to its (modification time in ns, size)
+
+    Methods
+    -------
+    template_for(path)
+        Returns the path of the template of the page at path
+    """
+
+    def __init__(self, root, default_template):
+        self.root = root
+        self.default_template = default_template
+        self.pages = []
+        self.templates = {}
+        self.stats = {}
+        # the template resolved for each directory, shared by every page (& subdirectory) within it
+        self.__resolved = {}
+        self._scan(root)
+
+    def _scan(self, directory):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # the type of most entries is known from the directory listing alone, without a stat call
+                if entry.is_dir():
+                    self._scan(entry.path)
+                elif entry.name == PAGE_NAME or entry.name == TEMPLATE_NAME:
+                    stat = entry.stat()
+                    self.stats[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    if entry.name == PAGE_NAME:
+                        self.pages.append(entry.path)
+                    else:
+                        self.templates[directory] = entry.path
+
+    def template_for(self, path):
+        '''Returns the template of the page at path: the 'template.html' in its directory or the nearest directory above it,
+        or else the default template
+        '''
+        return self._template_of_dir(os.path.dirname(path))
+
+    def _template_of_dir(self, directory):
+        template = self.__resolved.get(directory)
+        if template is None:
+            if directory in self.templates:
+                template = self.templates[directory]
+            elif directory == self.root or not directory.startswith(self.root + os.sep):
+                template = self.default_template
+            else:
+                template = self._template_of_dir(os.path.dirname(directory))
+            self.__resolved[directory] = template
+        return template
@@ -1,32 +1,34 @@
 import re
+import itertools
 from textnode import *
 from htmlnode import *
-from enum import Enum
-
-# ===================================
-# ======== EXCLUSIVE CLASSES ========
-# ===================================
-
-class BlockType(Enum):
-    PARAGRAPH = "paragraph"
-    HEADING = "heading"
-    CODE = "code"
-    QUOTE = "quote"
-    ULIST = "unordered_list"
-    OLIST = "ordered_list"
+from blocks import *
+from lrucache import LRUCache
+from search import node_text
 
 # ==================================
 # ======== HELPER FUNCTIONS ========
 # ==================================
 
+# inline delimiters, in the order of precedence they are interpreted in
+INLINE_DELIMITERS = (
+    ('**', TextType.BOLD),
+    ('*', TextType.ITALIC),
+    ('_', TextType.ITALIC),
+    ('`', TextType.CODE),
+)
+
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 # returns a list of tuples, each containing two strings: (alt text, link_url)
 def extract_markdown_images(md_text):
-    md_images = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", md_text)
+    md_images = IMAGE_PATTERN.findall(md_text)
     return md_images
 
 # returns a list of tuples, each containing two strings: (anchor text, image_link)
 def extract_markdown_links(md_text):
-    md_links = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", md_text)
+    md_links = LINK_PATTERN.findall(md_text)
     return md_links
 
 # ===================================
@@ -118,71 +120,115 @@ def split_nodes_link(old_nodes):
             new_nodes.append(node)
     return new_nodes
 
+def split_text_delimiters(text, new_nodes, level=0):
+    '''Splits text at the inline delimiters, appending the resulting TextNodes to new_nodes
+
+    Text between a pair of delimiters becomes a TextNode of that delimiter's TextType. Text outside of
+    them is split again at the delimiters of lower precedence, exactly as though split_nodes_delimiter
+    had been called once per delimiter, but without building a new list of TextNodes for each.
+    '''
+    # skip ahead to the first delimiter (in order of precedence) that appears in the text
+    while level < len(INLINE_DELIMITERS) and INLINE_DELIMITERS[level][0] not in text:
+        level += 1
+    if level == len(INLINE_DELIMITERS):
+        new_nodes.append(TextNode(text, TextType.TEXT))
+        return
+    delimiter, text_type = INLINE_DELIMITERS[level]
+    # if an odd number of the delimiter exists in a string, then one was left unclosed
+    text_bodies = text.split(delimiter)
+    if len(text_bodies) % 2 == 0:
+        raise Exception(f"invalid Markdown syntax; ensure closing delimiter \" {delimiter} \" ")
+    for i in range(0, len(text_bodies)):
+        if text_bodies[i] != "":
+            if i % 2 == 1:
+                new_nodes.append(TextNode(text_bodies[i], text_type))
+            else:
+                split_text_delimiters(text_bodies[i], new_nodes, level + 1)
+
+def split_text_links(text, new_nodes):
+    '''Splits text at links, & the text around them at the delimiters, appending the resulting TextNodes to new_nodes
+    '''
+    position = 0
+    for match in LINK_PATTERN.finditer(text):
+        if match.start() > position:
+            split_text_delimiters(text[position:match.start()], new_nodes)
+        new_nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        position = match.end()
+    if position < len(text) or position == 0:
+        # any text left after the last link; an empty text is kept as a single empty TextNode
+        split_text_delimiters(text[position:], new_nodes)
+
+def _text_to_textnodes(text):
+    '''Interprets input text string as a list of TextNodes, split at images, links, & delimiters
+
+    Images are found in one scan of the text, links in one scan of the text between them, & the text
+    around those is split at the delimiters as it is found. The result is the same as splitting one giant
+    TextNode of TextType.TEXT with split_nodes_image, split_nodes_link, & then split_nodes_delimiter for
+    each delimiter (images taking precedence over any link they overlap), but takes time linear in the length of the text.
+    '''
+    new_nodes = []
+    position = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        if match.start() > position:
+            split_text_links(text[position:match.start()], new_nodes)
+        new_nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    if position < len(text) or position == 0:
+        split_text_links(text[position:], new_nodes)
+    return new_nodes
+
+# ======== INLINE CACHES ========
+
+# generated sites repeat the same inline text across many pages (nav lists, footers, boilerplate list items, headings),
+# so the conversions of recently seen text are cached, & shared between every block of that text
+INLINE_CACHE_SIZE = 4096
+textnode_cache = LRUCache(lambda text: tuple(_text_to_textnodes(text)), INLINE_CACHE_SIZE)
+leaf_node_cache = LRUCache(lambda text: tuple(map(text_node_to_html_node, _text_to_textnodes(text))), INLINE_CACHE_SIZE)
+
+def set_inline_cache_size(maxsize):
+    '''Sets the number of texts whose inline conversions are cached; 0 disables the caches
+    '''
+    textnode_cache.resize(maxsize)
+    leaf_node_cache.resize(maxsize)
+
+def take_inline_cache_stats():
+    '''Returns & clears the {cache name: (hits, misses)} of the inline caches
+    '''
+    return {'text_to_textnodes': textnode_cache.take_stats(), 'leaf nodes': leaf_node_cache.take_stats()}
+
 def text_to_textnodes(text):
-    '''Interprets input text string as one giant TextNode of TextType.TEXT, then splits it into multiple TextNodes at images, links, & delimiters
+    '''Interprets input text string as a list of TextNodes, split at images, links, & delimiters
+
+    Cached; the TextNodes may be shared with earlier callers, & must not be changed.
     '''
-    old_nodes = []
-    old_nodes.append(TextNode(text, TextType.TEXT))
-    
-    # md images first, because they're just like links but with the ! before them
-    old_nodes = split_nodes_image(old_nodes)
-    # now we can do links
-    old_nodes = split_nodes_link(old_nodes)
-    # now bold first, since it uses 2 asterisks, while markdown uses one
-    old_nodes = split_nodes_delimiter(old_nodes, '**', TextType.BOLD)
-    # now italics; both the asterisk and underscore notations
-    old_nodes = split_nodes_delimiter(old_nodes, '*', TextType.ITALIC)
-    old_nodes = split_nodes_delimiter(old_nodes, '_', TextType.ITALIC)
-    # finally, we can do code markdown
-    old_nodes = split_nodes_delimiter(old_nodes, '`', TextType.CODE)
-    return old_nodes
+    return list(textnode_cache(text))
 
 # ==================================
 # ======== BLOCK CONVERSION ========
 # ==================================
 
-def block_to_block_type(md_block):
-    '''Dependent on expected markdown conventions, interprets the enum BlockType of a markdown block
-    '''
-    if bool(re.search("#{1,6} ", md_block[0:7])):
-        return BlockType.HEADING
-    if md_block.startswith("```") and md_block.endswith("```"):
-        return BlockType.CODE
-    if all(list(map(lambda x: x.startswith('>'), md_block.split('\n')))):
-        return BlockType.QUOTE
-    if all(list(map(lambda x: x.startswith('- '), md_block.split('\n')))):
-        return BlockType.ULIST
-    if md_block.startswith("1. "):
-        lines = md_block.split("\n")
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.OLIST
-    return BlockType.PARAGRAPH
-
-def block_to_block_text(md_block):
+def block_to_block_text(md_block, block_type=None, lines=None):
     '''Based on the input BlockType, removes markdown formatting from a markdown block to return the intended text value
+
+    If the block was already classified, its BlockType & lines (as returned by classify_block) may be passed in to skip classifying it again.
     '''
     # determine block type
-    block_type = block_to_block_type(md_block)
+    if block_type is None:
+        block_type, lines = classify_block(md_block)
     match block_type:
         case BlockType.PARAGRAPH:
             # browsers will handle newlines
-            return ' '.join(md_block.split('\n'))
+            return ' '.join(lines if lines is not None else md_block.split('\n'))
         case BlockType.CODE:
             # newlines in code blocks must be preserved, but not the ones off the beginning and end
             # the following should skip the first three backticks ``` and first newline, and include characters all the way up to the final newline
             return md_block[4:-3]
-            # return '\n'.join(list(map(lambda x: x.strip('`'), md_block.split('\n')))[1:-1:1])
         case BlockType.QUOTE:
             # browsers will render newlines where appropriate for quotes blocks, just like paragraph blocks 
-            return ' '.join(list(map(lambda x: x.lstrip('> '), md_block.split('\n'))))
+            return ' '.join(line.lstrip('> ') for line in (lines if lines is not None else md_block.split('\n')))
         case BlockType.HEADING:
             # Headings shouldn't have any newlines whatsoever to worry about
             return md_block.lstrip('# ')
-            #return '\n'.join(list(map(lambda x: x.lstrip('# '), md_block.split('\n'))))
         case _:
             raise ValueError(f'Enum input "{block_type}" not valid for function "block_to_block_text"')
 
@@ -190,51 +236,50 @@ def generate_leaf_nodes_from_block_text(md_block_text):
     '''Given a markdown block, construct multiple HTMLNode objects to represent varying font styles or text formatting (italics, bold, lists, etc)
     
     This function is the equivalent to the boot.dev course's function: "text_to_children(text)".
+    Cached; the list is new, but the LeafNodes in it may be shared with earlier callers, & must not be changed.
     '''
-    child_html_nodes = []
-    text_nodes = text_to_textnodes(md_block_text)
-    for node in text_nodes:
-        child_html_nodes.append(text_node_to_html_node(node))
-    return child_html_nodes
+    return list(leaf_node_cache(md_block_text))
             
 def block_to_html_node(md_block):
     '''Perform markdown-to-HTML conversion based on enum BlockType
+
+    The block is classified once, and its type & lines are carried through the conversion.
     '''
     # determine block type
-    block_type = block_to_block_type(md_block)
+    block_type, lines = classify_block(md_block)
     match block_type:
         case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(md_block)
+            return paragraph_to_html_node(md_block, lines)
         case BlockType.CODE:
-            return code_to_html_node(md_block)
+            return code_to_html_node(md_block, lines)
         case BlockType.QUOTE:
-            return quote_to_html_node(md_block)
+            return quote_to_html_node(md_block, lines)
         case BlockType.HEADING:
-            return heading_to_html_node(md_block)
+            return heading_to_html_node(md_block, lines)
         case BlockType.ULIST:
-            return ulist_to_html_node(md_block)
+            return ulist_to_html_node(md_block, lines)
         case BlockType.OLIST:
-            return olist_to_html_node(md_block)
+            return olist_to_html_node(md_block, lines)
         case _:
             raise ValueError(f'Enum input "{block_type}" not valid for function "block_to_html_node"')
 
-def paragraph_to_html_node(block):
-    block_text = block_to_block_text(block)
+def paragraph_to_html_node(block, lines=None):
+    block_text = block_to_block_text(block, BlockType.PARAGRAPH, lines)
     node = ParentNode(tag="p", children=generate_leaf_nodes_from_block_text(block_text))
     return node
 
-def code_to_html_node(block):
-    block_text = block_to_block_text(block)
+def code_to_html_node(block, lines=None):
+    block_text = block_to_block_text(block, BlockType.CODE, lines)
     node = ParentNode(tag="code", children=[text_node_to_html_node(TextNode(block_text, TextType.TEXT))])
     node_wrapped = ParentNode(tag="pre", children=[node])
     return node_wrapped
 
-def quote_to_html_node(block):
-    block_text = block_to_block_text(block)
+def quote_to_html_node(block, lines=None):
+    block_text = block_to_block_text(block, BlockType.QUOTE, lines)
     node = ParentNode(tag="blockquote", children=generate_leaf_nodes_from_block_text(block_text))
     return node
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, lines=None):
     '''Return an HTML heading tag
 
     Input "block" must be of type BlockType.HEADING.
@@ -243,12 +288,12 @@ def heading_to_html_node(block):
     def interpret_heading_size():
         return f"h{block[0:6].count('#')}"
 
-    block_text = block_to_block_text(block)
+    block_text = block_to_block_text(block, BlockType.HEADING, lines)
     node = ParentNode(tag=interpret_heading_size(), children=generate_leaf_nodes_from_block_text(block_text))
     return node
 
-def ulist_to_html_node(block):
-    list_items = block.split('\n')
+def ulist_to_html_node(block, lines=None):
+    list_items = lines if lines is not None else block.split('\n')
     html_items = []
     for item in list_items:
         item_text = item[2:]
@@ -257,8 +302,8 @@ def ulist_to_html_node(block):
     node = ParentNode(tag="ul", children=html_items)
     return node
 
-def olist_to_html_node(block):
-    list_items = block.split('\n')
+def olist_to_html_node(block, lines=None):
+    list_items = lines if lines is not None else block.split('\n')
     html_items = []
     for item in list_items:
         item_text = item[3:]
@@ -278,16 +323,102 @@ def markdown_to_blocks(md):
     return list(filter(lambda x: x != '', list(map( lambda x: x.strip(), md.split('\n\n')))))
 
 # converts a full markdown document into a single parent HTMLNode containing any relevant child ParentNode's and LeafNodes
-def markdown_to_html_node(md):
+def markdown_to_html_node(md, fragments=None, text=None):
     '''Top-level function generates HTMLNode given a markdown document 'md'
 
     1) Establishes an HTMLNode ParentNode object; all contents of the conversion will be placed within a <div></div> tag.
     2) Generates markdown blocks for the program to break down further for conversion.
     3) Returns a tree of HTMLNode objects representing all interpreted images, links, & text with appropriate emphasis.
+
+    If the PageFragments of a render cache are given, each block whose html was cached is spliced in as that html,
+    & only the blocks that weren't are converted (& then rendered, for the cache).
+    If a PageText is given, the text of each block is added to it as the block is converted, for the search index.
     '''
-    div_html = ParentNode("div", children=[], props=None, nest_depth=3)
+    div_html = ParentNode("div", children=[], props=None)
     # generate blocks from the full doc
     blocks = markdown_to_blocks(md)
+    if fragments is not None:
+        for md_block in blocks:
+            div_html.children.append(fragments.node_for(md_block, block_to_html_node, text))
+        return div_html
     for md_block in blocks:
         div_html.children.append(block_to_html_node(md_block))
-    return div_html
\ No newline at end of file
+        if text is not None:
+            text.add(node_text(div_html.children[-1]))
+    return div_html
+
+# ===============================================
+# ======== STREAMING MARKDOWN CONVERSION ========
+# ===============================================
+
+# the number of characters read from a markdown file at a time while streaming it
+STREAM_CHUNK_SIZE = 1 << 16
+
+def iter_markdown_blocks(file, chunk_size=STREAM_CHUNK_SIZE):
+    '''Yields the same markdown blocks as markdown_to_blocks, reading them from file one chunk at a time
+
+    Whatever follows the last divisor of a chunk is carried over into the next, as the rest of its block
+    (or even the rest of its divisor) may not have been read yet. Only one chunk & one block are held at once.
+    Each chunk is searched for divisors once, & the pieces of an unfinished block are only joined once it's finished,
+    so that a block spanning many chunks takes time linear in its length.
+    '''
+    pieces = []
+    # whether the last piece ends in a newline that may be the first half of a divisor split between two chunks
+    open_newline = False
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        start = 0
+        if open_newline and chunk[0] == '\n':
+            md_block = ''.join(pieces)[:-1].strip()
+            pieces = []
+            if md_block != '':
+                yield md_block
+            start = 1
+        while True:
+            end = chunk.find('\n\n', start)
+            if end == -1:
+                break
+            pieces.append(chunk[start:end])
+            md_block = ''.join(pieces).strip()
+            pieces = []
+            if md_block != '':
+                yield md_block
+            start = end + 2
+        rest = chunk[start:]
+        if rest:
+            pieces.append(rest)
+        open_newline = rest.endswith('\n')
+    md_block = ''.join(pieces).strip()
+    if md_block != '':
+        yield md_block
+
+class MarkdownStream(ParentNode):
+    '''A ParentNode of the same <div></div> as markdown_to_html_node, converting its children from a markdown file only as its HTML is written
+
+    Each block is converted, written, & then discarded, so that the HTMLNode tree of the full document is never built.
+    If a PageText is given, the text of each block is added to it as the block is converted.
+    '''
+    __slots__ = ("file", "text")
+
+    def __init__(self, file, text=None):
+        super().__init__("div", children=[], props=None)
+        self.file = file
+        self.text = text
+
+    def _convert(self, md_block):
+        node = block_to_html_node(md_block)
+        self.text.add(node_text(node))
+        return node
+
+    def _emit_html(self, emit, pretty=False, basepath='/', depth=0, minifier=None, omit_end_tag=False):
+        nodes = map(block_to_html_node if self.text is None else self._convert, iter_markdown_blocks(self.file))
+        # a lone child is not indented, so the first block is held back until it's known whether a second one follows
+        first = next(nodes, None)
+        if first is None:
+            raise ValueError("ParentNode must have one or more children")
+        second = next(nodes, None)
+        only_child = second is None
+        children = [first] if only_child else itertools.chain((first, second), nodes)
+        self._emit_element(emit, children, only_child, pretty, basepath, depth, minifier, omit_end_tag)
@@ -0,0 +1,99 @@
+'''Generates synthetic markdown for benchmarking, using every kind of block & inline markdown the generator supports
+'''
+import os
+import random
+
+WORDS = (
+    'the ring of power was forged in secret by the dark lord sauron within the fires of mount doom '
+    'hobbits elves dwarves wizards and men of the west journeyed across middle earth to destroy it'
+).split()
+
+def sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+def inline_text(rng, words=24):
+    '''Returns a line of text with a sprinkling of bold, italic, code, links, & images
+    '''
+    parts = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            word = f'**{word}**'
+        elif roll < 0.10:
+            word = f'_{word}_'
+        elif roll < 0.13:
+            word = f'`{word}`'
+        elif roll < 0.16:
+            word = f'[{word}](/blog/{word})'
+        elif roll < 0.17:
+            word = f'![{word}](/images/{word}.png)'
+        parts.append(word)
+    return ' '.join(parts)
+
+def block(rng):
+    '''Returns a single markdown block of a random BlockType
+    '''
+    roll = rng.random()
+    if roll < 0.45:
+        return '\n'.join(inline_text(rng) for _ in range(rng.randint(1, 4)))
+    if roll < 0.60:
+        return f'{"#" * rng.randint(2, 4)} {sentence(rng, 5)}'
+    if roll < 0.72:
+        return '\n'.join(f'- {inline_text(rng, 10)}' for _ in range(rng.randint(2, 6)))
+    if roll < 0.82:
+        return '\n'.join(f'{i}. {inline_text(rng, 10)}' for i in range(1, rng.randint(3, 7)))
+    if roll < 0.92:
+        return '\n'.join(f'> {sentence(rng)}' for _ in range(rng.randint(1, 3)))
+    return '```\n' + '\n'.join(f'print("{sentence(rng, 4)}")' for _ in range(rng.randint(2, 6))) + '\n```'
+
+def document(rng, blocks):
+    '''Returns a markdown document of the given number of blocks, beginning with the h1 header generate_page requires
+    '''
+    return '\n\n'.join([f'# {sentence(rng, 6)}'] + [block(rng) for _ in range(blocks)])
+
+def document_of_size(rng, size):
+    '''Returns a markdown document of roughly size characters
+    '''
+    parts = [f'# {sentence(rng, 6)}']
+    length = 0
+    while length < size:
+        parts.append(block(rng))
+        length += len(parts[-1]) + 2
+    return '\n\n'.join(parts)
+
+def link_heavy_list(rng, items):
+    '''Returns a markdown document made of one long list in which every item holds several links
+    '''
+    lines = [f'- [{rng.choice(WORDS)}](/blog/{i}) & [more](https://example.com/{i}?ref={rng.choice(WORDS)}) ![icon](/images/{i}.png)' for i in range(items)]
+    return f'# {sentence(rng, 4)}\n\n' + '\n'.join(lines)
+
+def write_page(content_dir, rel_dir, md):
+    page_dir = os.path.join(content_dir, rel_dir)
+    os.makedirs(page_dir, exist_ok=True)
+    with open(os.path.join(page_dir, 'index.md'), 'w') as file:
+        file.write(md)
+
+def write_corpus(content_dir, kind, count, seed=0, large_size=5 << 20):
+    '''Writes a synthetic content directory of the given kind, returning the number of pages written
+
+    kind is one of:
+        'small'  -- count small posts, each of a handful of blocks
+        'large'  -- count documents of about large_size characters (5 MB by default) each
+        'links'  -- count pages, each a list of 2,000 link-heavy items
+        'nested' -- count pages, each nested one directory deeper than the last
+    '''
+    rng = random.Random(seed)
+    write_page(content_dir, '', document(rng, 5))
+    for i in range(count):
+        if kind == 'small':
+            write_page(content_dir, os.path.join('blog', str(i % 100), str(i)), document(rng, rng.randint(3, 12)))
+        elif kind == 'large':
+            write_page(content_dir, os.path.join('docs', str(i)), document_of_size(rng, large_size))
+        elif kind == 'links':
+            write_page(content_dir, os.path.join('links', str(i)), link_heavy_list(rng, 2000))
+        elif kind == 'nested':
+            write_page(content_dir, os.path.join(*(['deep'] * (i + 1))), document(rng, 4))
+        else:
+            raise ValueError(f'Unknown corpus kind "{kind}"')
+    return count + 1
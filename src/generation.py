@@ -1,6 +1,15 @@
 import os
-from conversions import markdown_to_html_node
+import io
+import contextlib
+from collections import namedtuple
+from conversions import markdown_to_html_node, MarkdownStream, set_inline_cache_size, take_inline_cache_stats
 from htmlnode import *
+from template import load_template
+from profiling import Profiler
+from rendercache import take_render_cache_stats
+from minify import Minifier
+from output import AtomicOutput
+from search import PageText, collect_page_text, take_page_texts
 
 def omit_cd(path):
     '''Rewrites the cwd within the input path as '.' if present, for easier reading
@@ -15,19 +24,138 @@ def extract_title(md):
         raise Exception('The first line in the input markdown file must be an h1 header.')
     return h1_header.lstrip('#').strip()
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    '''Given an html file to use as a template, generates an HTML webpage using a markdown file and writes the result as dest_path
+def read_markdown(from_path):
+    with open(from_path, 'r') as file:
+        return file.read()
+
+def write_page(dest_path, template, values, pretty=False, minifier=None):
+    '''Writes a webpage as dest_path, streaming the content directly into the file in place of '{{ Content }}'
+
+    The page is written atomically, & an existing page with the same contents is left untouched; returns whether it was written.
+    '''
+    output = AtomicOutput(dest_path)
+    with output as file:
+        template.write(file, values, pretty=pretty, minifier=minifier)
+    return output.written
+
+def report_minified(dest_path, saved, size=None):
+    '''Prints the bytes that minifying the page written as dest_path (of size bytes, if known) saved
+    '''
+    if size is None:
+        size = os.path.getsize(dest_path)
+    print(f'Minified {omit_cd(dest_path)} to {size} bytes, saving {saved} ({saved / max(1, size + saved) * 100:.1f}%).')
+
+def make_dest_dir(dest_path):
+    '''Makes the directory that dest_path is written into, if it doesn't exist, returning whether it had to be made
     '''
     # check that the directory for dest_path (the path of the file to write) exists.
-    if not os.path.exists(os.path.dirname(dest_path)):
+    if os.path.exists(os.path.dirname(dest_path)):
+        return False
+    # another worker process may be making the same directories during a parallel build
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    return True
+
+def announce_page(from_path, template_path, dest_path, made_dirs=False):
+    if made_dirs:
         print(f'Write-To directory "{os.path.dirname(dest_path)}" does not exist. Making relevant directories now...')
-        os.makedirs(os.path.dirname(dest_path))
     print(f'Generating page from {omit_cd(from_path)} to {omit_cd(dest_path)} using {omit_cd(template_path)}.')
-    with open(from_path, 'r') as file:
-        md = file.read()
-    HTML_template = open(template_path).read()
-    HTML_content = markdown_to_html_node(md).to_html()
-    HTML_page = HTML_template.replace('{{ Title }}', extract_title(md)).replace('{{ Content }}', HTML_content).replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
-    with open(dest_path, 'w') as file:
-        file.write(HTML_page)
-    
+
+# the arguments of generate_page, as a build hands them to workers
+PageJob = namedtuple('PageJob', ['from_path', 'template_path', 'dest_path', 'basepath', 'pretty', 'stream', 'render_cache', 'minify', 'search'],
+                     defaults=('/', False, False, None, None, False))
+
+# everything a page is rendered from, as read by read_page
+PageSource = namedtuple('PageSource', ['template', 'md', 'minifier', 'fragments', 'made_dirs'])
+
+def read_page(from_path, template_path, dest_path, basepath="/", render_cache=None, minify=None):
+    '''Reads the markdown, template, & any cached fragments of a page, & makes the directory it's written into, returning a PageSource
+
+    Only the disk (& the cache of compiled templates) is touched, so that pages may be read on other threads while one is rendered.
+    '''
+    made_dirs = make_dest_dir(dest_path)
+    # links & images are made relative to the basepath as the template is compiled, & as the content is rendered
+    template = load_template(template_path, basepath, minify)
+    minifier = None if minify is None else Minifier(minify)
+    md = read_markdown(from_path)
+    fragments = None
+    if render_cache is not None:
+        # the blocks sit one level deeper than the <div> filling the template's content slot
+        fragments = render_cache.load(from_path, template.depth_of('Content') + 1, minifier)
+    return PageSource(template, md, minifier, fragments, made_dirs)
+
+def page_values(source, text=None):
+    '''Returns the values of the template's slots for the page read as source, adding its text to the PageText text, if given
+    '''
+    return {'Title': extract_title(source.md), 'Content': markdown_to_html_node(source.md, source.fragments, text)}
+
+def generate_page(from_path, template_path, dest_path, basepath="/", pretty=False, stream=False, render_cache=None, minify=None, search=False):
+    '''Given an html file to use as a template, generates an HTML webpage using a markdown file and writes the result as dest_path
+
+    If stream is True, the markdown file is read & converted one block at a time as the page is written,
+    so that memory stays bounded for very large documents.
+    If a RenderCache is given, only the blocks of the page whose html isn't already cached are rendered (unless streaming).
+    If Minify options are given, the template & the page's content are minified as they're written, rather than pretty printed.
+    If search is True, the page's text is tokenized as it's converted, & collected for take_page_texts.
+    Returns whether the page was written, or left untouched as it was already the same.
+    '''
+    text = PageText() if search else None
+    if stream:
+        announce_page(from_path, template_path, dest_path, make_dest_dir(dest_path))
+        HTML_template = load_template(template_path, basepath, minify)
+        minifier = None if minify is None else Minifier(minify)
+        with open(from_path, 'r') as md_file:
+            title = extract_title(md_file.readline())
+            md_file.seek(0)
+            written = write_page(dest_path, HTML_template, {'Title': title, 'Content': MarkdownStream(md_file, text)}, pretty, minifier)
+    else:
+        source = read_page(from_path, template_path, dest_path, basepath, render_cache, minify)
+        announce_page(from_path, template_path, dest_path, source.made_dirs)
+        HTML_template, minifier = source.template, source.minifier
+        title = extract_title(source.md)
+        written = write_page(dest_path, HTML_template, page_values(source, text), pretty, minifier)
+        if source.fragments is not None:
+            render_cache.save(from_path, source.fragments)
+    if minifier is not None:
+        report_minified(dest_path, minifier.saved + HTML_template.saved)
+    if text is not None:
+        collect_page_text(dest_path, title, text)
+    return written
+
+
+# the profiler of a worker process, if the parallel build it is part of is being profiled
+_worker_profiler = None
+
+def init_worker(profile=False, inline_cache_size=None):
+    '''Prepares a worker process of a parallel build to profile & cache the same way as the main process
+    '''
+    global _worker_profiler
+    if inline_cache_size is not None:
+        set_inline_cache_size(inline_cache_size)
+    if profile:
+        _worker_profiler = Profiler()
+        _worker_profiler.install()
+
+def take_cache_stats():
+    '''Returns & clears the {cache name: (hits, misses)} of the inline caches & the render cache in this process
+    '''
+    stats = take_inline_cache_stats()
+    stats['render cache'] = take_render_cache_stats()
+    return stats
+
+def generate_page_quietly(page_job):
+    '''Runs generate_page for a PageJob (or a tuple of the same arguments), returning its log rather than printing it
+
+    Used by the worker processes of a parallel build, so that the logs of pages generated at the same time don't interleave.
+    Returns a (log, profile, cache_stats, written, page_texts) tuple, where profile holds the page's timings if the build is being profiled, or None if not,
+    cache_stats holds the hits & misses of the caches while generating the page, as returned by take_cache_stats,
+    written is whether the page was written, as returned by generate_page, & page_texts holds the page's text
+    if it was indexed for search, as returned by take_page_texts.
+    '''
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        if _worker_profiler is None:
+            written = generate_page(*page_job)
+            return log.getvalue(), None, take_cache_stats(), written, take_page_texts()
+        with _worker_profiler.page(omit_cd(page_job[0])):
+            written = generate_page(*page_job)
+    return log.getvalue(), _worker_profiler.take(), take_cache_stats(), written, take_page_texts()
@@ -1,3 +1,11 @@
+import sys
+import itertools
+from minify import VERBATIM_TAGS
+
+# props whose values are urls, which are rewritten to respect the basepath when root-relative
+URL_PROPS = ("href", "src")
+# any tags in this set will follow a <tag ...> structure
+VOID_TAGS = frozenset(["img", "br", "hr", "input", "meta", "link"])
 
 class HTMLNode:
     """
@@ -7,8 +15,6 @@ class HTMLNode:
 
     Attributes
     ----------
-    should_pretty_print : bool
-        a value dependnet on user input that determines whether or not the HTML result should be pretty printed, or in one line
     tag : str
         an enum type used to assign this HTMLNode a predefined set of behaviors
     value : str
@@ -17,30 +23,31 @@ class HTMLNode:
         a list of HTMLNodes owned by and nested within this HTMLNode
     props : str[]
         a list of HTML attributes (properties) for this HTMLNode
-    nest_depth : int
-        a value representing how deeply this HTMLNode may be nested within others
 
     Methods
     -------
-    to_html()
+    to_html(basepath, pretty, depth, minifier)
         A template method for returning a finalized HTML tag for use on a webpage
 
-        _generate_html()
-            A method for generating a valid HTML tag for use on a webpage
-            
-    props_to_html()
+        _emit_html(emit, pretty, basepath, depth, minifier, omit_end_tag)
+            A method for generating a valid HTML tag for use on a webpage, one fragment at a time
+
+    write_html(file, basepath, pretty, depth, minifier)
+        Streams the finalized HTML tag into a file, without building it as one string first
+
+    props_to_html(basepath)
         Takes in a list of props and prepares them for use in an HTML tag
     """
 
-    should_pretty_print = False
+    # a large document creates hundreds of thousands of nodes, so they are kept compact without a per-instance __dict__
+    __slots__ = ("tag", "value", "children", "props")
 
-
-    def __init__(self, tag=None, value=None, children=None, props=None, nest_depth=0):
-        self.tag = tag
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        # interned, so that the many nodes sharing a tag also share a single string
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
         self.props = props
-        self.nest_depth = nest_depth
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
@@ -54,34 +61,79 @@ class HTMLNode:
         )
 
 
-    def to_html(self):
+    def to_html(self, basepath='/', pretty=False, depth=0, minifier=None):
         """A template method for returning a finalized HTML tag for use on a webpage.
         
-        Takes in html generated from markdown with _generate_html, applies this HTMLNode's
-        properties to the HTML tag where needed, and returns the result for use on a webpage.
-        The purpose is purely to ensure that any relevant props are added to the opening tag
-        of the generated HTML.
+        Collects the fragments of html generated from markdown with _emit_html into a list,
+        joining them only once at the end, rather than copying the growing string for every child.
+
+        Parameters
+        ----------
+        basepath : str, optional
+            The path that root-relative links & images (e.g. href="/blog") are rewritten to be relative to
+        pretty : bool, optional
+            Whether or not the html should be pretty printed, rather than generated in one line
+        depth : int, optional
+            How deeply this HTMLNode is nested within the page, which its pretty-printed children are indented relative to
+        minifier : Minifier, optional
+            The Minifier to collapse the whitespace of the html with, rather than writing it as it is
+
+        Raises ; None
+        """
+        fragments = []
+        self._emit_html(fragments.append, pretty=pretty, basepath=basepath, depth=depth, minifier=minifier)  # Subclasses implement this
+        return ''.join(fragments)
 
-        Parameters ; None || Raises ; None
+    def write_html(self, file, basepath='/', pretty=False, depth=0, minifier=None):
+        """Streams the finalized HTML tag for use on a webpage into a file, one fragment at a time.
+
+        Parameters
+        ----------
+        file : file object
+            Any object with a write method, such as a file opened for writing text
+        basepath : str, optional
+            The path that root-relative links & images (e.g. href="/blog") are rewritten to be relative to
+        pretty : bool, optional
+            Whether or not the html should be pretty printed, rather than generated in one line
+        depth : int, optional
+            How deeply this HTMLNode is nested within the page, which its pretty-printed children are indented relative to
+        minifier : Minifier, optional
+            The Minifier to collapse the whitespace of the html with, rather than writing it as it is
+        """
+        self._emit_html(file.write, pretty=pretty, basepath=basepath, depth=depth, minifier=minifier)
+
+    def _open_tag(self, basepath='/'):
+        """Returns the opening (or otherwise self-closing!) tag of this HTMLNode, along with its props
         """
-        raw_html = self._generate_html(pretty=self.should_pretty_print)  # Subclasses implement this
-        if self.tag and self.props:
-            # replace the lead opening (or otherwise self-closing!) tag with itself, and the props
-            return f'<{self.tag}{self.props_to_html()}' + raw_html.replace(f'<{self.tag}', '', 1)
-        return raw_html
+        if self.props:
+            return f'<{self.tag}{self.props_to_html(basepath)}>'
+        return f'<{self.tag}>'
 
-    def _generate_html(self, pretty=False):
+    def _emit_html(self, emit, pretty=False, basepath='/', depth=0, minifier=None, omit_end_tag=False):
         """A method for generating a valid HTML tag for use on a webpage
         
         Used internally within subclasses (hence the leading "_").
+        Rather than returning the HTML, passes it to emit one fragment at a time, in order.
         In the LeafNode subclass, generation is as simple as closing content within tags.
         In the ParentNode subclass, generation must handle any relevant pretty printing,
-        as well as recursively convert children to HTML, before returning a valid HTML tag.
+        as well as recursively convert children to HTML, between emitting the opening & closing tags.
+        The depth of each child is that of its parent plus one, counted as the tree is traversed,
+        so the same tree may be rendered with different settings at once (e.g. from several threads).
 
         Parameters
         ----------
+        emit : callable
+            Called with each fragment of the HTML, e.g. list.append or a file's write method
         pretty : bool, optional
             Whether or not the html should be generated in pretty-printed format
+        basepath : str, optional
+            The path that root-relative links & images are rewritten to be relative to
+        depth : int, optional
+            How deeply this HTMLNode is nested, in levels of two-space indentation
+        minifier : Minifier, optional
+            The Minifier that collapses the whitespace of text (outside of <pre> & <code>), & decides which end tags are dropped
+        omit_end_tag : bool, optional
+            Whether the end tag of this HTMLNode is dropped, as decided by its parent's minifier from what follows it
 
         Raises
         ------
@@ -90,66 +142,89 @@ class HTMLNode:
         NotImplementedError
             If called on the HTMLNode class directly, and not on a subclass
         """
-        raise NotImplementedError("Subclasses must implement _generate_html")
+        raise NotImplementedError("Subclasses must implement _emit_html")
 
-    def props_to_html(self):
+    def props_to_html(self, basepath='/'):
         attributes_s = ""
         for i in self.props:
-            attributes_s += f' {i}="{self.props.get(i)}"'
+            value = self.props.get(i)
+            if i in URL_PROPS and basepath != '/' and value.startswith('/'):
+                # root-relative links & images point within the site, which may not be served from the root of its domain
+                value = basepath + value[1:]
+            attributes_s += f' {i}="{value}"'
         return attributes_s
 
 
 class LeafNode(HTMLNode):
     '''A subclass of HTMLNode made to represent an HTML tag with a value, but no children
     '''
-    def __init__(self, tag, value, props=None, nest_depth=1):
-        super().__init__(tag=tag, value=value, children=None, props=props, nest_depth=nest_depth)
-        # any tags in this given list will follow a <tag ...> structure
-        self.__closes_self = tag in ["img", "br", "hr", "input", "meta", "link"]
+    __slots__ = ()
+
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag=tag, value=value, children=None, props=props)
 
-    def _generate_html(self, pretty=False):
+    def _emit_html(self, emit, pretty=False, basepath='/', depth=0, minifier=None, omit_end_tag=False):
         if self.value == None:
             raise ValueError("all leaf nodes must have a value")
         if self.tag == None:
-            return self.value
-        if self.__closes_self:
-            return f'<{self.tag}>'
+            emit(self.value if minifier is None else minifier.text(self.value))
+        elif self.tag in VOID_TAGS:
+            emit(self._open_tag(basepath))
         else:
-            return f'<{self.tag}>{self.value}</{self.tag}>'
+            emit(self._open_tag(basepath))
+            if minifier is None:
+                emit(self.value)
+            else:
+                emit((minifier.verbatim if self.tag in VERBATIM_TAGS else minifier).text(self.value))
+            if not omit_end_tag:
+                emit(f'</{self.tag}>')
 
 
 class ParentNode(HTMLNode):
     '''A type of HTMLNode representing an HTML tag with children, & therefore no value
     '''
-    def __init__(self, tag, children, props=None, nest_depth=0):
-        # Call parent constructor with no value
-        super().__init__(tag=tag, value=None, children=children, props=props, nest_depth=nest_depth)
-        if self.should_pretty_print == True:
-            if len(self.children) > 0:
-                for c in self.children:
-                    c.nest_depth = self.nest_depth + 1
-
-    def _generate_html(self, pretty=False):
-
-        def prettify(child=None):
-            '''Returns an indentation whose depth is 2 * nest_depth of the subject the (subject being self or child)
-            '''
-            if pretty is False:
-                return ''
-            if len(self.children) == 1 or self.tag == 'p' or self.tag == 'li':
-                return ''
-            target_depth = self.nest_depth if child is None else child.nest_depth
-            indent = '\n'
-            for i in range(0, target_depth + 1):
-                indent += '  '
-            return indent
+    __slots__ = ()
 
+    def __init__(self, tag, children, props=None):
+        # Call parent constructor with no value
+        super().__init__(tag=tag, value=None, children=children, props=props)
+
+    def _indent(self, pretty, only_child, depth):
+        '''Returns a newline & an indentation of 2 * depth spaces, or nothing if this node's children aren't indented
+        '''
+        if pretty is False:
+            return ''
+        if only_child or self.tag == 'p' or self.tag == 'li':
+            return ''
+        return '\n' + '  ' * depth
+
+    def _emit_html(self, emit, pretty=False, basepath='/', depth=0, minifier=None, omit_end_tag=False):
         if self.tag ==  None:
             raise ValueError("ParentNode must have a tag")
         if self.children == None or len(self.children) == 0:
             raise ValueError("ParentNode must have one or more children")
-        # generate an html string from children and wrap it in self.tag
-        children_html = ''
-        for child in self.children:
-            children_html += prettify(child=child) + child.to_html()
-        return f'<{self.tag}>{children_html}{prettify()}</{self.tag}>'
\ No newline at end of file
+        self._emit_element(emit, self.children, len(self.children) == 1, pretty, basepath, depth, minifier, omit_end_tag)
+
+    def _emit_element(self, emit, children, only_child, pretty, basepath, depth, minifier, omit_end_tag):
+        '''Emits the html of each of children in turn, one level deeper than & wrapped in self.tag
+        '''
+        emit(self._open_tag(basepath))
+        if minifier is not None and self.tag in VERBATIM_TAGS:
+            minifier = minifier.verbatim
+        indent = self._indent(pretty, only_child, depth + 1)
+        if minifier is None or not minifier.options.drop_end_tags:
+            for child in children:
+                if indent:
+                    emit(indent)
+                child._emit_html(emit, pretty=pretty, basepath=basepath, depth=depth + 1, minifier=minifier)
+        else:
+            # whether a child's end tag may be dropped depends on what follows it, so each child is paired with the next
+            for child, following in itertools.pairwise(itertools.chain(children, (None,))):
+                next_tag = None if following is None else following.tag or ''
+                omit = minifier.omits_end_tag(child.tag, next_tag, self.tag)
+                child._emit_html(emit, pretty=pretty, basepath=basepath, depth=depth + 1, minifier=minifier, omit_end_tag=omit)
+        indent = self._indent(pretty, only_child, depth)
+        if indent:
+            emit(indent)
+        if not omit_end_tag:
+            emit(f'</{self.tag}>')
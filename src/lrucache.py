@@ -0,0 +1,75 @@
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    A cache of the results of a function, keeping only the most recently used results
+
+    Results are shared between every caller that asks for the same key, so they must be treated as immutable.
+
+    ...
+
+    Attributes
+    ----------
+    compute : callable
+        the function whose results are cached, called with a key whenever that key isn't cached
+    maxsize : int
+        the greatest number of results kept; a maxsize of 0 disables the cache entirely
+    hits : int
+        the number of lookups answered from the cache since the statistics were last taken
+    misses : int
+        the number of lookups that had to call compute since the statistics were last taken
+
+    Methods
+    -------
+    __call__(key)
+        Returns the result of compute(key), from the cache if possible
+    resize(maxsize)
+        Changes the greatest number of results kept, evicting the least recently used results to fit
+    take_stats()
+        Returns & clears the (hits, misses) counted so far
+    """
+
+    def __init__(self, compute, maxsize=4096):
+        self.compute = compute
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__results = OrderedDict()
+
+    def __len__(self):
+        return len(self.__results)
+
+    def __call__(self, key):
+        results = self.__results
+        if key in results:
+            self.hits += 1
+            results.move_to_end(key)
+            return results[key]
+        self.misses += 1
+        result = self.compute(key)
+        if self.maxsize > 0:
+            results[key] = result
+            if len(results) > self.maxsize:
+                results.popitem(last=False)
+        return result
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self.__results) > max(maxsize, 0):
+            self.__results.popitem(last=False)
+
+    def clear(self):
+        self.__results.clear()
+
+    def take_stats(self):
+        stats = (self.hits, self.misses)
+        self.hits = 0
+        self.misses = 0
+        return stats
+
+
+def hit_rate(hits, misses):
+    '''Returns the percentage of lookups that hit, or 0 if there were none
+    '''
+    lookups = hits + misses
+    return hits / lookups * 100 if lookups else 0.0
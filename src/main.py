@@ -1,92 +1,100 @@
 import os
-import shutil
-
 import argparse
-parser = argparse.ArgumentParser()
-#-dp DISABLE PRETTY PRINTING #
-parser.add_argument("-bp", "--basepath", nargs=1, type=str, help="Configure custom basepath", default="/")
-parser.add_argument("-p", "--pretty", help="Use pretty printing", action="store_true")
-args = parser.parse_args()
-
-from textnode import *
-from htmlnode import *
-from conversions import *
-from generation import *
-
-# save root, content, static, & docs directories for use in function definitions
-root_dir = os.getcwd()
-content_path = os.path.join(root_dir, 'content')
-static_dir = os.path.join(root_dir, 'static')
-docs_dir = os.path.join(root_dir, 'docs')
-# save path to default template, located in the root directory
-template_path = os.path.join(root_dir, 'template.html')
-
-
-def copy_dir(from_dir, to_dir, b_clean=False):
-    '''Copies the contents of one directory to another, deleting any existing destination directory, if desired.
-    '''
-    # check that the from_dir is valid and has files to work with
-    if not os.path.exists(from_dir):
-        raise ValueError(f'Copy-From directory "{from_dir}" does not exist.')
-    # a list of paths within the "from_dir" directory that could be files, or directories themselves
-    from_paths = os.listdir(from_dir)
-    if len(from_paths) == 0:
-        if b_clean:
-            raise Exception(f'{from_dir} contains no files to copy!')
-        print(f'{omit_cd(from_dir)} contains no files to copy. Skipping directory.')
-        return
-    # delete any existing to_dir if b_clean is true
-    if b_clean:
-        if os.path.exists(to_dir):
-            shutil.rmtree(to_dir)
-    # remake to_dir
-    if not os.path.exists(to_dir):
-        os.mkdir(to_dir)
-    # here, we acknowledge that shutil.copytree exists, but use shutil.copy anyway, for recursion practice
-    print(f'Copying contents of {omit_cd(from_dir)} to {omit_cd(to_dir)}...')
-    for p in from_paths:
-        new_from_path = os.path.join(from_dir, p)
-        new_to_path = os.path.join(to_dir, p)
-        if os.path.isfile(new_from_path):
-            shutil.copy(new_from_path, new_to_path)
-        else:
-            # recursively copy over any subdirectories
-            copy_dir(new_from_path, new_to_path)
-
 
-def generate_pages_recursive(path, generate_dir):
-    '''Generates webpages from given path
+from conversions import set_inline_cache_size, INLINE_CACHE_SIZE
+from rendercache import DEFAULT_CACHE_SIZE
+from profiling import Profiler
+from compress import SIDECAR_EXTENSIONS
+from minify import parse_minify
+from pipeline import IO_THREADS
+from changes import apply_changes
+from builder import *
 
-    Given a path, check that the path is an 'index.md' file. If so, use any relevant
-    template to generate an 'index.html' file in the 'generate_dir/...'. If the path
-    is a directory, recursively generates htmls from any paths within it.
-    '''
-    if not os.path.isfile(path):
-        subpaths = os.listdir(path)
-        if len(subpaths) > 0:
-            for s in subpaths:
-                generate_pages_recursive(os.path.join(path, s), generate_dir)
-    if path.endswith('index.md'):
-            # set the template path to default, located in the root directory
-            template = template_path
-            theoretical_template_path = os.path.join(os.path.dirname(path), 'template.html')
-            if os.path.exists(theoretical_template_path):
-                # if there exists a template more specific to this webpage, use that in lieu of default
-                template = theoretical_template_path
-            # set a generation path for 'index.html' in ./docs that mirrors 'index.md' seen in ./content
-            relpath = os.path.dirname(path).replace(content_path, '').lstrip('/')
-            generation_path = os.path.join(generate_dir, relpath, 'index.html')
-            # Generate a page from ./content/.../index.md using ./template.html and write the result to ./docs/.../index.html
-            generate_page(path, template, generation_path, basepath=args.basepath[0])
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    #-dp DISABLE PRETTY PRINTING #
+    parser.add_argument("-bp", "--basepath", nargs=1, type=str, help="Configure custom basepath", default="/")
+    parser.add_argument("-p", "--pretty", help="Use pretty printing", action="store_true")
+    parser.add_argument("-j", "--jobs", type=int, help="Generate pages in this many worker processes", default=1)
+    parser.add_argument("--io-threads", type=int, help="Read & write pages on this many threads while others are rendered, when generating pages in one process (0 reads & writes each page in turn)", default=IO_THREADS)
+    parser.add_argument("-f", "--force", help="Ignore the build manifest and regenerate every page", action="store_true")
+    parser.add_argument("--hash-static", help="Compare static files by content hash, rather than by size & modification time", action="store_true")
+    parser.add_argument("--link-static", help="Hard link static files into the docs directory instead of copying them, where possible", action="store_true")
+    parser.add_argument("--profile", help="Report the time spent in each phase of the build, the slowest pages, & peak memory", action="store_true")
+    parser.add_argument("--profile-json", type=str, help="Also write the profile report as JSON to this path", default=None)
+    parser.add_argument("--profile-top", type=int, help="Number of slowest pages to list in the profile report", default=10)
+    parser.add_argument("--stream", help="Convert & write each page one markdown block at a time, keeping memory bounded for very large documents", action="store_true")
+    parser.add_argument("--inline-cache", type=int, help="Number of texts whose inline conversions are cached & reused across pages (0 disables the cache)", default=INLINE_CACHE_SIZE)
+    parser.add_argument("--no-cache", help="Render every block of each generated page, rather than reusing the html cached by previous builds", action="store_true")
+    parser.add_argument("--clear-cache", help="Delete the render cache before building", action="store_true")
+    parser.add_argument("--cache-size", type=int, help="Megabytes the render cache is pruned back to after each build", default=DEFAULT_CACHE_SIZE >> 20)
+    parser.add_argument("--minify", nargs="?", const="", type=str, help="Collapse the whitespace of pages & their templates outside of <pre> & <code>, & drop these comma-separated extras too (comments, end-tags)", default=None)
+    parser.add_argument("--search", help="Index the text of every page for search, as sharded JSON within the docs directory's 'search' directory", action="store_true")
+    parser.add_argument("--precompress", nargs="?", const="gz", type=str, help="Write precompressed sidecars of compressible output files, in these comma-separated formats (gz, xz; gz by default)", default=None)
+    parser.add_argument("--apply-changes", type=str, help="After building, apply the output files the build added, modified, & deleted to this directory (a local stand-in for wherever the site is deployed)", default=None)
+    parser.add_argument("-w", "--watch", help="Serve the docs directory, rebuilding whatever changes in the content, static, & template files", action="store_true")
+    parser.add_argument("--port", type=int, help="Port to serve the docs directory on in watch mode", default=8888)
+    parser.add_argument("--batch", type=str, help="Build every site listed in this JSON file in one process, rather than the site in the current directory", default=None)
+    args = parser.parse_args(argv)
+    if args.batch and args.watch:
+        parser.error("--watch serves a single site, & can't be used with --batch")
+    if args.batch and args.apply_changes:
+        parser.error("--apply-changes deploys a single site, & can't be used with --batch")
+    if args.minify is not None:
+        if args.pretty:
+            parser.error("--pretty & --minify can't be used together")
+        try:
+            args.minify = parse_minify([extra for extra in args.minify.split(',') if extra])
+        except ValueError as e:
+            parser.error(str(e))
+    if args.precompress:
+        unknown = set(args.precompress.split(',')) - set(SIDECAR_EXTENSIONS)
+        if unknown:
+            parser.error(f"--precompress supports {', '.join(SIDECAR_EXTENSIONS)}, not {', '.join(sorted(unknown))}")
+    if args.batch:
+        try:
+            args.batch_sites = read_batch(args.batch)
+        except ValueError as e:
+            parser.error(str(e))
+        for root, options in args.batch_sites:
+            if options.get('pretty', args.pretty) and options.get('minify', args.minify) is not None:
+                parser.error(f'The site at "{root}" would be both pretty printed & minified')
+    return args
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
     print(args.basepath[0])
-    copy_dir(static_dir, docs_dir, b_clean=True)
-    # parse arguments to determine whether we should disable pretty printing
-    HTMLNode.should_pretty_print = args.pretty
-    if args.pretty:
-        print(f'Using pretty printing...')
-    # find all 'index.md' and relevant 'template.html' files in the content directory and generate 'index.html' files within the docs directory
-    generate_pages_recursive(content_path, docs_dir)
+    options = dict(
+        basepath=args.basepath[0],
+        pretty=args.pretty,
+        stream=args.stream,
+        hash_static=args.hash_static,
+        link_static=args.link_static,
+        cache=not args.no_cache,
+        cache_size=args.cache_size << 20,
+        minify=args.minify,
+        search=args.search,
+        precompress=args.precompress.split(',') if args.precompress else (),
+    )
+    set_inline_cache_size(args.inline_cache)
+    profiler = Profiler(enabled=args.profile)
+    if args.batch:
+        # every site listed takes its options from the command line, unless the batch file gives its own
+        sites = [site_at(root, **{**options, **site_options}) for root, site_options in args.batch_sites]
+        build_sites(sites, jobs=args.jobs, force=args.force, profiler=profiler, clear_cache=args.clear_cache, io_threads=args.io_threads)
+    else:
+        # the site is found in the directory the generator is run from
+        site = site_at(os.getcwd(), **options)
+        site.build(jobs=args.jobs, force=args.force, profiler=profiler, clear_cache=args.clear_cache, io_threads=args.io_threads)
+        if args.apply_changes:
+            copied, deleted = apply_changes(site.out_dir, args.apply_changes)
+            print(f'Applied the changes to {args.apply_changes}: copied {copied} & deleted {deleted} file(s).')
+    if args.profile:
+        print(profiler.report(slowest=args.profile_top))
+        if args.profile_json:
+            profiler.write_json(args.profile_json, slowest=args.profile_top)
+    if args.watch:
+        site.watch(port=args.port)
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
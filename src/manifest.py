@@ -0,0 +1,172 @@
+import os
+import json
+import hashlib
+
+MANIFEST_NAME = '.build-manifest'
+MANIFEST_VERSION = 1
+
+def hash_file(path):
+    '''Returns a hex digest of the contents of the file at path
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    A persistent record of the inputs used to generate each page of a previous build
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        the location of the manifest file, which is written within the directory it describes
+    options : dict
+        the build options (basepath, pretty printing, etc.) the recorded pages were generated with
+    pages : dict
+        maps the path of each generated page, relative to the manifest's directory, to the hashes of its inputs
+    seen : set
+        the pages that were generated or confirmed as current during this build
+    reused : int
+        the number of pages found to be current during this build
+    stamps : dict
+        maps the absolute path of each input hashed during the last build to its [mtime in ns, size, hash]; unlike the pages,
+        stamps are only meaningful on the machine that made them, so they aren't made relative to the manifest's directory
+    file_stats : dict
+        maps the path of any input to its (mtime in ns, size) during this build, if already known (e.g. from a ContentIndex);
+        the hashes of inputs whose stats match their stamps are reused, rather than read & hashed again
+
+    Methods
+    -------
+    is_current(source_path, template_path, dest_path)
+        Whether or not dest_path was generated from the exact same inputs during the last build
+    invalidate()
+        Forgets the inputs of every recorded page, so that none are current, while still accounting for their outputs
+    record(source_path, template_path, dest_path)
+        Saves the hashes of the inputs used to generate dest_path
+    outputs()
+        Returns the paths of every file the manifest accounts for, relative to its directory
+    discard(dest_path)
+        Deletes a previously generated page and forgets it
+    prune()
+        Deletes any previously generated pages whose sources no longer exist
+    save()
+        Writes the manifest to disk
+    """
+
+    def __init__(self, path, options, pages=None, stamps=None):
+        self.path = path
+        self.options = options
+        self.pages = pages if pages is not None else {}
+        self.stamps = stamps if stamps is not None else {}
+        self.file_stats = {}
+        self.seen = set()
+        self.reused = 0
+        self.__hashes = {}
+        self.__stamps = {}
+
+    @classmethod
+    def load(cls, path, options):
+        '''Loads the manifest at path, or returns an empty one if it is missing or unreadable
+
+        If it was built with other options (or by another version), no page is current, but every page is still accounted for.
+        '''
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(path, options)
+        pages = data.get('pages')
+        manifest = cls(path, options, pages=pages if isinstance(pages, dict) else {}, stamps=data.get('stamps', {}))
+        if data.get('version') != MANIFEST_VERSION or data.get('options') != options:
+            # pages built with different options can't be reused; everything must be regenerated, but in place, so that
+            # pages whose html the options don't change (e.g. --search) are left untouched rather than deleted as orphans
+            manifest.invalidate()
+        return manifest
+
+    def _key(self, dest_path):
+        return os.path.relpath(dest_path, os.path.dirname(self.path))
+
+    def _hash(self, path):
+        # templates are shared by many pages, so remember every hash computed during this build
+        if path not in self.__hashes:
+            stat = self.file_stats.get(path)
+            stamp = self.stamps.get(path)
+            if stat is not None and stamp is not None and tuple(stamp[:2]) == stat:
+                self.__hashes[path] = stamp[2]
+            else:
+                self.__hashes[path] = hash_file(path)
+            if stat is not None:
+                self.__stamps[path] = [*stat, self.__hashes[path]]
+        return self.__hashes[path]
+
+    def _entry(self, source_path, template_path):
+        return {
+            'source': self._hash(source_path),
+            'template': os.path.relpath(template_path, os.path.dirname(self.path)),
+            'template_hash': self._hash(template_path),
+        }
+
+    def is_current(self, source_path, template_path, dest_path):
+        key = self._key(dest_path)
+        self.seen.add(key)
+        if not os.path.isfile(dest_path):
+            return False
+        if self.pages.get(key) != self._entry(source_path, template_path):
+            return False
+        self.reused += 1
+        return True
+
+    def record(self, source_path, template_path, dest_path):
+        key = self._key(dest_path)
+        self.seen.add(key)
+        self.pages[key] = self._entry(source_path, template_path)
+
+    def invalidate(self):
+        # the pages are kept (without their inputs) so that the outputs of a forced build are rewritten in place, & only
+        # where they changed, rather than deleted as orphans first
+        self.pages = dict.fromkeys(self.pages)
+        self.stamps = {}
+
+    def outputs(self):
+        return set(self.pages) | {MANIFEST_NAME}
+
+    def discard(self, dest_path):
+        '''Deletes the page at dest_path, along with any directories it leaves empty, and forgets it
+
+        Returns whether or not there was a page to delete.
+        '''
+        root = os.path.dirname(self.path)
+        self.pages.pop(self._key(dest_path), None)
+        if not os.path.isfile(dest_path):
+            return False
+        os.remove(dest_path)
+        # clean up any directories left empty by the deletion, without leaving the manifest's directory
+        dest_dir = os.path.dirname(dest_path)
+        while dest_dir != root and os.path.isdir(dest_dir) and not os.listdir(dest_dir):
+            os.rmdir(dest_dir)
+            dest_dir = os.path.dirname(dest_dir)
+        return True
+
+    def prune(self):
+        '''Deletes the output of every recorded page that was not seen during this build, returning their paths
+        '''
+        root = os.path.dirname(self.path)
+        removed = []
+        for key in sorted(set(self.pages) - self.seen):
+            dest_path = os.path.join(root, key)
+            if self.discard(dest_path):
+                removed.append(dest_path)
+        return removed
+
+    def save(self):
+        # a full build stamps every input it indexed, dropping those of deleted files, while a
+        # rebuild of a few pages (e.g. during a watch) keeps the stamps of every other input from the last
+        stamps = self.__stamps if self.file_stats else {**self.stamps, **self.__stamps}
+        data = {'version': MANIFEST_VERSION, 'options': self.options, 'pages': self.pages, 'stamps': stamps}
+        with open(self.path, 'w') as file:
+            json.dump(data, file, indent=1, sort_keys=True)
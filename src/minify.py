@@ -0,0 +1,223 @@
+'''Minifies html as it's serialized: collapsing whitespace outside of <pre> & <code>, & optionally dropping comments & optional end tags
+'''
+import re
+from collections import namedtuple
+
+# the options of a minified build; whitespace is always collapsed, & comments & optional end tags are dropped only if asked
+Minify = namedtuple('Minify', ['drop_comments', 'drop_end_tags'], defaults=(False, False))
+# the name of each extra that may be asked for on the command line, e.g. '--minify comments,end-tags'
+MINIFY_EXTRAS = {'comments': 'drop_comments', 'end-tags': 'drop_end_tags'}
+
+# only the whitespace that html collapses; a non-breaking space is content, & must be kept
+WHITESPACE_PATTERN = re.compile(r'[ \t\n\r\f]+')
+# a run of whitespace that isn't already a single space
+COLLAPSIBLE_PATTERN = re.compile(r'[ \t\n\r\f]{2,}|[\t\n\r\f]')
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+# a piece of markup: a tag, a comment, or the doctype
+MARKUP_PATTERN = re.compile(r'<!--.*?-->|<[^>]*>', re.DOTALL)
+TAG_NAME_PATTERN = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)')
+
+# the text within these elements is never markup (e.g. the '<' of 'i<n' in a script), & runs up to the element's end tag
+RAW_TEXT_TAGS = frozenset(['script', 'style', 'textarea', 'title'])
+RAW_TEXT_END_PATTERNS = {tag: re.compile(rf'</{tag}(?=[\s/>])', re.IGNORECASE) for tag in RAW_TEXT_TAGS}
+
+# the text within these elements is shown (or run) just as it's written
+VERBATIM_TAGS = frozenset(['pre', 'code', 'textarea', 'script', 'style'])
+# whitespace beside these elements may be shown as a space, so it's collapsed rather than dropped
+INLINE_TAGS = frozenset([
+    'a', 'abbr', 'b', 'bdi', 'bdo', 'button', 'cite', 'code', 'data', 'dfn', 'em', 'i', 'img', 'input', 'kbd', 'label',
+    'mark', 'q', 's', 'samp', 'select', 'small', 'span', 'strong', 'sub', 'sup', 'textarea', 'time', 'u', 'var',
+])
+# a <p> is closed by the start of any of these, so its end tag may be omitted before one
+P_CLOSING_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset', 'figcaption', 'figure', 'footer',
+    'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hgroup', 'hr', 'main', 'menu', 'nav', 'ol', 'p', 'pre',
+    'search', 'section', 'table', 'ul',
+])
+# ...& by the end of its parent, unless the parent is one of these
+P_KEEPING_PARENTS = frozenset(['a', 'audio', 'del', 'ins', 'map', 'noscript', 'video'])
+
+def parse_minify(extras):
+    '''Returns the Minify options for the given names of extras (e.g. ['comments', 'end-tags'])
+    '''
+    unknown = [extra for extra in extras if extra not in MINIFY_EXTRAS]
+    if unknown:
+        raise ValueError(f'Unknown minify option "{unknown[0]}"; expected one of {", ".join(MINIFY_EXTRAS)}')
+    return Minify(**{MINIFY_EXTRAS[extra]: True for extra in extras})
+
+def end_tag_optional(tag, next_tag, parent_tag):
+    '''Returns whether the end tag of an element may be omitted, as the html spec allows
+
+    next_tag is the tag of whatever follows the element within its parent: None at the end of the parent,
+    '' for text, or '!--' for a comment.
+    '''
+    if tag == 'li':
+        return next_tag is None or next_tag == 'li'
+    if tag == 'p':
+        if next_tag is None:
+            return parent_tag not in P_KEEPING_PARENTS
+        return next_tag in P_CLOSING_TAGS
+    if tag in ('head', 'body', 'html'):
+        return next_tag != '!--'
+    return False
+
+
+class Minifier:
+    """
+    Minifies the text & end tags of one rendering of html, counting the bytes saved
+
+    ...
+
+    Attributes
+    ----------
+    options : Minify
+        what is dropped besides collapsible whitespace
+    saved : int
+        the number of bytes dropped so far, counted on the minifier the rendering began with
+    verbatim : Minifier
+        the minifier for text within <pre> & <code>, which keeps its whitespace & counts towards the same total
+
+    Methods
+    -------
+    text(value)
+        Returns value with its whitespace collapsed (& its comments dropped, if asked)
+    omits_end_tag(tag, next_tag, parent_tag)
+        Returns whether the end tag of an element is dropped, given what follows it
+    fresh()
+        Returns a new Minifier with the same options, having saved nothing yet
+    """
+
+    def __init__(self, options=Minify(), collapse=True, root=None):
+        self.options = options
+        self.collapse = collapse
+        self.saved = 0
+        # bytes saved within <pre> & <code> are counted on the minifier they're nested within
+        self.root = self if root is None else root
+        self.verbatim = Minifier(options, collapse=False, root=self) if collapse else self
+
+    def text(self, value):
+        if self.options.drop_comments and '<!--' in value:
+            stripped = COMMENT_PATTERN.sub('', value)
+            self.root.saved += len(value.encode()) - len(stripped.encode())
+            value = stripped
+        if self.collapse:
+            collapsed, count = COLLAPSIBLE_PATTERN.subn(' ', value)
+            if count:
+                # only ascii whitespace is collapsed, so every character dropped is one byte
+                self.root.saved += len(value) - len(collapsed)
+                value = collapsed
+        return value
+
+    def omits_end_tag(self, tag, next_tag, parent_tag):
+        if not self.options.drop_end_tags or not end_tag_optional(tag, next_tag, parent_tag):
+            return False
+        self.root.saved += len(tag) + 3
+        return True
+
+    def fresh(self):
+        return Minifier(self.options)
+
+
+def _markup_name(markup):
+    '''Returns the tag of a piece of markup, along with whether it's an end tag; comments are named '!--', & the doctype ''
+    '''
+    if markup.startswith('<!--'):
+        return '!--', False
+    match = TAG_NAME_PATTERN.match(markup)
+    if match is None:
+        return '', False
+    return match.group(2).lower(), match.group(1) == '/'
+
+def _split_markup(html):
+    '''Splits html into text & markup, which alternate starting & ending with text, returning the parts along with
+    the (name, whether it's an end tag) of each piece of markup (& None for each text)
+
+    The text of a raw text element (e.g. a <script>) is taken whole, up to its end tag, whatever it holds.
+    '''
+    parts = []
+    names = []
+    position = search_from = 0
+    while True:
+        match = MARKUP_PATTERN.search(html, search_from)
+        if match is None:
+            break
+        markup = match.group()
+        name = _markup_name(markup)
+        parts += (html[position:match.start()], markup)
+        names += (None, name)
+        position = search_from = match.end()
+        if name[0] in RAW_TEXT_TAGS and not name[1]:
+            end = RAW_TEXT_END_PATTERNS[name[0]].search(html, position)
+            # an element left unclosed runs to the end of the html
+            search_from = len(html) if end is None else end.start()
+    parts.append(html[position:])
+    names.append(None)
+    return parts, names
+
+def minify_html(html, options=Minify()):
+    '''Returns html with its whitespace collapsed outside of <pre> & <code>, & its comments & optional end tags dropped, if asked
+
+    Whitespace beside any element that isn't inline (e.g. between '</li>' & '<li>') is dropped altogether.
+    Meant for html written by hand, like templates, which is minified once rather than as each page is rendered.
+    '''
+    parts, names = _split_markup(html)
+    verbatim = 0
+    for i in range(0, len(parts), 2):
+        if i > 0:
+            name, closing = names[i - 1]
+            if name in VERBATIM_TAGS:
+                verbatim += -1 if closing else 1
+        if verbatim > 0:
+            continue
+        text = WHITESPACE_PATTERN.sub(' ', parts[i])
+        if text == ' ':
+            # whitespace alone is dropped unless it's between inline elements, looking past any comments
+            if not (_nearest_tag(parts, names, i, -1) in INLINE_TAGS and _nearest_tag(parts, names, i, 1) in INLINE_TAGS):
+                text = ''
+        else:
+            # comments are left as neighbours that whitespace may show beside, as they may be kept
+            if i == 0 or names[i - 1][0] not in INLINE_TAGS and names[i - 1][0] != '!--':
+                text = text.lstrip(' ')
+            if i == len(parts) - 1 or names[i + 1][0] not in INLINE_TAGS and names[i + 1][0] != '!--':
+                text = text.rstrip(' ')
+        parts[i] = text
+    if options.drop_comments:
+        for i in range(1, len(parts), 2):
+            # conditional comments are read by old browsers, & so are kept
+            if names[i][0] == '!--' and not parts[i].startswith('<!--[if'):
+                parts[i] = ''
+    if options.drop_end_tags:
+        for i in range(1, len(parts), 2):
+            name, closing = names[i]
+            if closing and end_tag_optional(name, *_following(parts, names, i)):
+                parts[i] = ''
+    return ''.join(parts)
+
+def _nearest_tag(parts, names, i, step):
+    '''Returns the name of the nearest tag before (step -1) or after (step 1) the text parts[i], past comments & whitespace, or None
+    '''
+    for j in range(i + step, -1 if step < 0 else len(parts), step):
+        if j % 2 == 0:
+            if parts[j].strip(' \t\n\r\f'):
+                return ''
+        elif names[j][0] != '!--':
+            return names[j][0]
+    return None
+
+def _following(parts, names, i):
+    '''Returns the (next tag, parent tag) of the element whose end tag is parts[i], as end_tag_optional takes them
+    '''
+    for j in range(i + 1, len(parts)):
+        if j % 2 == 0:
+            if parts[j]:
+                return '', None
+            continue
+        if not parts[j]:
+            # a comment that was dropped
+            continue
+        name, closing = names[j]
+        if closing:
+            # the end of the element's parent
+            return None, name
+        return name, None
+    return None, None
@@ -0,0 +1,81 @@
+'''Writes the output files of a build atomically, leaving any whose contents are unchanged untouched
+
+Rewriting a file with the same contents still changes its modification time, which sends tools downstream
+(rsync, CDNs, & the like) to copy it again. So new contents are compared with the file already on disk, by size
+& then by hash, & only written if they differ: whole, into a temporary file that then replaces the old one,
+so that a build that's interrupted never leaves a truncated page behind.
+'''
+import os
+import hashlib
+
+from manifest import hash_file
+
+# pages are written as utf-8, as their templates declare
+OUTPUT_ENCODING = 'utf-8'
+
+def temp_path_for(path):
+    # beside the file it replaces, as a rename is only atomic within one filesystem
+    return f'{path}.{os.getpid()}.tmp'
+
+def file_size(path):
+    '''Returns the size of the file at path, or None if there is none
+    '''
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+def write_if_changed(path, data):
+    '''Writes data (bytes) as the file at path, unless the file already holds exactly data, returning whether it was written
+    '''
+    if file_size(path) == len(data) and hash_file(path) == hashlib.sha256(data).hexdigest():
+        return False
+    temp_path = temp_path_for(path)
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+    os.replace(temp_path, path)
+    return True
+
+def write_text_if_changed(path, text):
+    return write_if_changed(path, text.encode(OUTPUT_ENCODING))
+
+
+class AtomicOutput:
+    """
+    A context manager opening a temporary file to write the text of a file into, which replaces the file on exit unless they're the same
+
+    Used for pages written a fragment at a time, whose whole contents are never held in memory to compare beforehand.
+    If the block within it raises an exception, the temporary file is removed & the file is left as it was.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        the path of the file to write
+    written : bool
+        whether the file was written, or left untouched as its contents were unchanged; None until the context exits
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = temp_path_for(path)
+        self.written = None
+        self.__file = None
+
+    def __enter__(self):
+        self.__file = open(self.temp_path, 'w', encoding=OUTPUT_ENCODING)
+        return self.__file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__file.close()
+        if exc_type is not None:
+            os.remove(self.temp_path)
+            return False
+        if file_size(self.path) == os.path.getsize(self.temp_path) and hash_file(self.path) == hash_file(self.temp_path):
+            os.remove(self.temp_path)
+            self.written = False
+        else:
+            os.replace(self.temp_path, self.path)
+            self.written = True
+        return False
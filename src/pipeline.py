@@ -0,0 +1,72 @@
+'''Generates pages in a pipeline: the sources of upcoming pages are read, & finished pages written, by a pool of threads
+while the page between them is rendered, so that neither the CPU nor the disk (or network volume) sits idle waiting on the other
+'''
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from generation import *
+from output import write_text_if_changed
+
+# threads reading sources & writing pages
+IO_THREADS = 4
+# pages whose sources are read ahead of the page being rendered
+READ_AHEAD = 8
+# rendered pages waiting to be written, before rendering waits on the oldest
+WRITE_BEHIND = 8
+
+def write_rendered_page(dest_path, html, render_cache=None, from_path=None, fragments=None):
+    '''Writes the html rendered for a page as dest_path (unless it's unchanged), & saves its fragments into the render cache, if it has one
+
+    Returns whether the page was written.
+    '''
+    written = write_text_if_changed(dest_path, html)
+    if fragments is not None:
+        render_cache.save(from_path, fragments)
+    return written
+
+def generate_pages_pipelined(page_jobs, threads=IO_THREADS, read_ahead=READ_AHEAD, write_behind=WRITE_BEHIND):
+    '''Generates the page of each job (a tuple of the arguments of generate_page), yielding a (job, written) tuple once its page is written
+    (or left untouched, if it was unchanged)
+
+    The sources of the next read_ahead pages are read, & the last write_behind pages written, on threads while each page
+    is rendered on the calling thread, in order (as the inline caches aren't shared between threads, & so that the logs
+    read the same as generate_page's). Reading waits while rendering falls behind, & rendering waits while writing does,
+    so that no more than read_ahead + write_behind pages are held in memory however many there are.
+    Pages that are streamed are generated by generate_page as they're reached, as they read & write one block at a time anyway.
+    '''
+    jobs = iter(page_jobs)
+    reads = deque()
+    writes = deque()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+
+        def read_next():
+            for job in jobs:
+                page = PageJob(*job)
+                future = None if page.stream else pool.submit(read_page, page.from_path, page.template_path, page.dest_path, page.basepath, page.render_cache, page.minify)
+                reads.append((job, future))
+                return
+
+        for _ in range(read_ahead):
+            read_next()
+        while reads:
+            job, future = reads.popleft()
+            read_next()
+            if future is None:
+                yield job, generate_page(*job)
+                continue
+            page = PageJob(*job)
+            source = future.result()
+            announce_page(page.from_path, page.template_path, page.dest_path, source.made_dirs)
+            text = PageText() if page.search else None
+            html = source.template.render(page_values(source, text), pretty=page.pretty, minifier=source.minifier)
+            if source.minifier is not None:
+                report_minified(page.dest_path, source.minifier.saved + source.template.saved, len(html.encode()))
+            if text is not None:
+                collect_page_text(page.dest_path, extract_title(source.md), text)
+            if len(writes) >= write_behind:
+                written_job, written = writes.popleft()
+                yield written_job, written.result()
+            writes.append((job, pool.submit(write_rendered_page, page.dest_path, html, page.render_cache, page.from_path, source.fragments)))
+        while writes:
+            written_job, written = writes.popleft()
+            yield written_job, written.result()
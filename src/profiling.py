@@ -0,0 +1,201 @@
+import sys
+import json
+import time
+import functools
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    # the resource module is only available on Unix-like platforms
+    resource = None
+
+def peak_memory():
+    '''Returns the peak resident memory of this process in bytes, or None if it can't be measured
+    '''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is measured in bytes on macOS, but in kilobytes everywhere else
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Profiler:
+    """
+    Collects timings for each phase of a build, and for each page generated
+
+    Phases nest (e.g. inline parsing happens during markdown conversion), so each phase is only
+    credited with the time spent in it directly, excluding the time of any phases nested within it.
+
+    ...
+
+    Attributes
+    ----------
+    enabled : bool
+        whether or not any timings are collected; a disabled profiler costs next to nothing
+    phases : dict
+        maps the name of each phase to a [seconds, calls] list
+    pages : dict
+        maps the path of each generated page to the seconds spent generating it
+    peak_memory : int
+        the largest peak resident memory, in bytes, of this process or any worker process that reported to it
+
+    Methods
+    -------
+    phase(name)
+        A context manager timing the code within it as the named phase
+    page(path)
+        A context manager timing the code within it as the generation of the page at path
+    install()
+        Times the functions that make up each phase of generating a page, until uninstall() is called
+    take()
+        Returns & clears the timings collected so far, for merging into another Profiler with merge()
+    report(slowest)
+        Returns a human-readable summary of the timings
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.phases = {}
+        self.pages = {}
+        self.peak_memory = None
+        self.__stack = []
+        self.__installed = []
+        self.__start = time.perf_counter()
+
+    def _enter(self, name):
+        # each entry holds the phase name, its start time, and the time spent in phases nested within it
+        self.__stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self):
+        name, start, nested = self.__stack.pop()
+        elapsed = time.perf_counter() - start
+        totals = self.phases.setdefault(name, [0.0, 0])
+        totals[0] += elapsed - nested
+        totals[1] += 1
+        if self.__stack:
+            self.__stack[-1][2] += elapsed
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def phase(self, name):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed_page(self, path):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.pages[path] = time.perf_counter() - start
+
+    def page(self, path):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed_page(path)
+
+    def wrap(self, func, name):
+        '''Returns a version of func that times each of its calls as the named phase
+        '''
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            self._enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit()
+        return timed
+
+    def _patch(self, owner, attribute, name):
+        original = getattr(owner, attribute)
+        self.__installed.append((owner, attribute, original))
+        setattr(owner, attribute, self.wrap(original, name))
+
+    def install(self):
+        '''Replaces the functions that make up each phase of generating a page with timed versions of themselves
+        '''
+        if not self.enabled or self.__installed:
+            return
+        # imported here, as these modules are only patched when a build is actually being profiled
+        import conversions
+        import generation
+        from htmlnode import HTMLNode
+        from template import Template
+        self._patch(generation, 'read_markdown', 'file reads')
+        self._patch(generation, 'load_template', 'file reads')
+        self._patch(generation, 'markdown_to_html_node', 'html nodes')
+        self._patch(conversions, 'markdown_to_blocks', 'markdown_to_blocks')
+        self._patch(conversions, 'classify_block', 'block classification')
+        # only the parsing itself is timed, rather than any lookups answered by the inline caches
+        self._patch(conversions, '_text_to_textnodes', 'inline parsing')
+        self._patch(HTMLNode, 'to_html', 'to_html')
+        self._patch(HTMLNode, 'write_html', 'to_html')
+        self._patch(Template, 'write', 'template fill')
+        self._patch(generation, 'write_page', 'writes')
+
+    def uninstall(self):
+        while self.__installed:
+            owner, attribute, original = self.__installed.pop()
+            setattr(owner, attribute, original)
+
+    def take(self):
+        '''Returns the timings collected so far as a dict, and clears them
+        '''
+        data = {'phases': self.phases, 'pages': self.pages, 'peak_memory': peak_memory()}
+        self.phases = {}
+        self.pages = {}
+        return data
+
+    def merge(self, data):
+        '''Adds the timings returned by another Profiler's take() to this one's
+        '''
+        for name, (seconds, calls) in data['phases'].items():
+            totals = self.phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+        self.pages.update(data['pages'])
+        if data['peak_memory'] is not None:
+            self.peak_memory = max(self.peak_memory or 0, data['peak_memory'])
+
+    def to_dict(self, slowest=10):
+        own_peak = peak_memory()
+        peaks = [peak for peak in (own_peak, self.peak_memory) if peak is not None]
+        slowest_pages = sorted(self.pages.items(), key=lambda item: item[1], reverse=True)[:slowest]
+        return {
+            'total_seconds': time.perf_counter() - self.__start,
+            'phases': {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in self.phases.items()},
+            'pages': len(self.pages),
+            'page_seconds': sum(self.pages.values()),
+            'slowest_pages': [{'path': path, 'seconds': seconds} for path, seconds in slowest_pages],
+            'peak_memory_bytes': max(peaks) if peaks else None,
+        }
+
+    def report(self, slowest=10):
+        '''Returns a human-readable summary of the timing of each phase, the slowest pages, & peak memory
+        '''
+        data = self.to_dict(slowest)
+        lines = [f'Build profile: {data["total_seconds"]:.3f} s total, {data["pages"]} page(s) generated']
+        lines.append(f'  {"phase":<24}{"seconds":>10}{"calls":>10}{"share":>8}')
+        phase_total = sum(phase['seconds'] for phase in data['phases'].values()) or 1
+        for name, phase in sorted(data['phases'].items(), key=lambda item: item[1]['seconds'], reverse=True):
+            share = phase['seconds'] / phase_total * 100
+            lines.append(f'  {name:<24}{phase["seconds"]:>10.4f}{phase["calls"]:>10}{share:>7.1f}%')
+        if data['slowest_pages']:
+            lines.append(f'Slowest {len(data["slowest_pages"])} page(s):')
+            for page in data['slowest_pages']:
+                lines.append(f'  {page["seconds"]:>10.4f} s  {page["path"]}')
+        if data['peak_memory_bytes'] is not None:
+            lines.append(f'Peak memory: {data["peak_memory_bytes"] / (1 << 20):.1f} MB')
+        return '\n'.join(lines)
+
+    def write_json(self, path, slowest=10):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(slowest), file, indent=1)
@@ -0,0 +1,227 @@
+import os
+import json
+import shutil
+import hashlib
+from htmlnode import LeafNode
+from search import node_text
+
+RENDER_CACHE_VERSION = 2
+# the modules whose code decides the html (& text) of a block; editing any of them invalidates every cached fragment
+RENDERER_MODULES = ('blocks.py', 'conversions.py', 'htmlnode.py', 'minify.py', 'search.py', 'textnode.py')
+DEFAULT_CACHE_SIZE = 256 << 20
+
+# hits & misses of every PageFragments in this process, since they were last taken
+_stats = [0, 0]
+
+def take_render_cache_stats():
+    '''Returns & clears the (hits, misses) of the render cache in this process
+    '''
+    stats = tuple(_stats)
+    _stats[0] = _stats[1] = 0
+    return stats
+
+def block_hash(md_block):
+    return hashlib.blake2b(md_block.encode(), digest_size=16).hexdigest()
+
+def renderer_hash():
+    '''Returns a hex digest of the code of the modules that render markdown blocks as html
+    '''
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in RENDERER_MODULES:
+        with open(os.path.join(src_dir, name), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class Fragment(LeafNode):
+    '''A LeafNode of html that was already rendered (& minified, if the page is), emitted just as it is
+    '''
+    __slots__ = ()
+
+    def _emit_html(self, emit, pretty=False, basepath='/', depth=0, minifier=None, omit_end_tag=False):
+        emit(self.value)
+
+
+class PageFragments:
+    """
+    The cached html of each block of one page, along with the fragments rendered for it during this build
+
+    ...
+
+    Attributes
+    ----------
+    cached : dict
+        maps the hash of each block rendered during the last build of the page to its html
+    used : dict
+        maps the hash of each block of the page during this build to its html
+    basepath : str
+        the basepath the fragments are rendered with
+    pretty : bool
+        whether or not the fragments are pretty printed
+    depth : int
+        how deeply the blocks are nested within the page, which pretty-printed fragments are indented relative to
+    minifier : Minifier
+        the minifier of the page, which fragments are minified like & whose count of bytes saved they add to, or None
+    cached_saved : dict
+        maps the hash of each block rendered during the last build of the page to the bytes minifying it saved
+    saved : dict
+        maps the hash of each block of the page during this build to the bytes minifying it saved
+    cached_texts : dict
+        maps the hash of each block rendered during the last build of the page to its text, if it was indexed for search
+    texts : dict
+        maps the hash of each block of the page indexed for search during this build to its text
+
+    Methods
+    -------
+    node_for(md_block, convert, text)
+        Returns a Fragment of the block's html, from the cache if possible, or else by rendering convert(md_block),
+        adding the block's text to the PageText text, if given
+    """
+
+    def __init__(self, cached, basepath='/', pretty=False, depth=1, minifier=None, cached_saved=None, cached_texts=None):
+        self.cached = cached
+        self.used = {}
+        self.basepath = basepath
+        self.pretty = pretty
+        self.depth = depth
+        self.minifier = minifier
+        self.cached_saved = cached_saved if cached_saved is not None else {}
+        self.saved = {}
+        self.cached_texts = cached_texts if cached_texts is not None else {}
+        self.texts = {}
+
+    def node_for(self, md_block, convert, text=None):
+        key = block_hash(md_block)
+        html = self.cached.get(key)
+        if html is None or text is not None and key not in self.cached_texts:
+            _stats[1] += 1
+            node = convert(md_block)
+            html = self._render(node, key)
+            if text is not None:
+                self.texts[key] = node_text(node)
+        else:
+            _stats[0] += 1
+            if self.minifier is not None:
+                self.saved[key] = self.cached_saved.get(key, 0)
+            if text is not None:
+                self.texts[key] = self.cached_texts[key]
+        self.used[key] = html
+        if self.minifier is not None:
+            self.minifier.saved += self.saved[key]
+        if text is not None:
+            text.add(self.texts[key])
+        # a raw fragment, indented by its parent like the block's own node would have been
+        return Fragment(None, html)
+
+    def _render(self, node, key):
+        if self.minifier is None:
+            return node.to_html(basepath=self.basepath, pretty=self.pretty, depth=self.depth)
+        # each block is minified on its own, so that what it saved is known when it's reused
+        minifier = self.minifier.fresh()
+        html = node.to_html(basepath=self.basepath, minifier=minifier)
+        # every block opens with a tag that closes a <p> just as the end of the div does,
+        # so whether a block's end tag may be dropped doesn't depend on where in the div it falls
+        if minifier.omits_end_tag(node.tag, None, 'div'):
+            html = html[:-len(node.tag) - 3]
+        self.saved[key] = minifier.saved
+        return html
+
+    def changed(self):
+        return self.used != self.cached or self.saved != self.cached_saved or self.texts != self.cached_texts
+
+
+class RenderCache:
+    """
+    A persistent, size-bounded cache of the html rendered for each block of each page, kept between builds
+
+    The fragments of each page are stored together in one file, named for the page's source & the build options,
+    so that rebuilding a page after editing one of its blocks renders only that block, at the cost of a single read.
+    The least recently used files are evicted once the cache grows beyond max_bytes.
+
+    ...
+
+    Attributes
+    ----------
+    directory : str
+        the directory the cache is stored in
+    options : dict
+        the build options (basepath, pretty printing, etc.) that fragments are rendered with
+    max_bytes : int
+        the size the cache is pruned back to by prune()
+
+    Methods
+    -------
+    load(source_path, depth, minifier)
+        Returns the PageFragments cached for the page generated from source_path, with its blocks at the given depth
+    save(source_path, fragments)
+        Stores the fragments rendered for the page generated from source_path during this build
+    prune()
+        Evicts the least recently used pages' fragments until the cache fits in max_bytes
+    clear()
+        Deletes the whole cache
+    """
+
+    def __init__(self, directory, options, max_bytes=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.options = options
+        self.max_bytes = max_bytes
+        self.key = json.dumps({'version': RENDER_CACHE_VERSION, 'options': options, 'renderer': renderer_hash()}, sort_keys=True)
+
+    def path_for(self, source_path, depth=1):
+        # pretty-printed fragments are indented for their depth, which depends on the page's template
+        name = hashlib.sha256(f'{self.key}\n{depth}\n{os.path.abspath(source_path)}'.encode()).hexdigest()
+        return os.path.join(self.directory, name[:2], name[2:] + '.json')
+
+    def load(self, source_path, depth=1, minifier=None):
+        path = self.path_for(source_path, depth)
+        try:
+            with open(path) as file:
+                data = json.load(file)
+            cached, cached_saved = data['html'], data['saved']
+            # only the blocks of pages indexed for search have their text cached
+            cached_texts = data.get('text', {})
+            # marks the page's fragments as recently used, for eviction
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            # a missing or unreadable cache file is the same as an empty one
+            cached, cached_saved, cached_texts = {}, {}, {}
+        return PageFragments(cached, basepath=self.options.get('basepath', '/'), pretty=self.options.get('pretty', False), depth=depth,
+                             minifier=minifier, cached_saved=cached_saved, cached_texts=cached_texts)
+
+    def save(self, source_path, fragments):
+        if not fragments.changed():
+            return
+        path = self.path_for(source_path, fragments.depth)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written whole & then renamed, so that a build that's interrupted never leaves a torn file behind
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({'html': fragments.used, 'saved': fragments.saved, 'text': fragments.texts}, file, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def prune(self):
+        '''Deletes the least recently used cache files until the cache fits in max_bytes, returning the number deleted
+        '''
+        if not os.path.isdir(self.directory):
+            return 0
+        entries = []
+        total = 0
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        deleted = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            deleted += 1
+        return deleted
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
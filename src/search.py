@@ -0,0 +1,277 @@
+'''Builds a full-text search index of a site's pages as they're generated, sharded so that a browser fetches only what it searches
+
+The text of each block is tokenized as the block is converted (or read back from the render cache along with its html),
+so the markdown is never read a second time. The pages generated by each build are merged into the index the builds
+before it left, & only the shards holding tokens that were added or removed are written again.
+'''
+import os
+import re
+import json
+import bisect
+
+from htmlnode import LeafNode
+from output import write_text_if_changed
+
+# the directory, within the out directory, that the shards & the list of pages are written into
+SEARCH_DIR = 'search'
+SEARCH_PAGES = 'pages.json'
+# the tokens of every page indexed so far, so that the next build knows which shards a changed or deleted page is in
+SEARCH_STATE = '.search-index'
+SEARCH_VERSION = 1
+# words of letters, digits, & underscores; words shorter than MIN_TOKEN_LENGTH still count towards positions, but aren't indexed
+TOKEN_PATTERN = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 2
+# each token is in the shard named for its first SHARD_PREFIX characters, if they're all ascii letters, digits, or '_',
+# & in the shard named OTHER_SHARD otherwise
+SHARD_PREFIX = 2
+SHARD_NAME_PATTERN = re.compile(r'[a-z0-9_]+')
+OTHER_SHARD = '-'
+# the children of these elements are separate runs of text, rather than inline parts of one
+SEPARATED_TAGS = frozenset(['div', 'ul', 'ol', 'li', 'pre'])
+
+def node_text(node):
+    '''Returns the text of an HTMLNode & its children, as it would be read on the page
+    '''
+    if isinstance(node, LeafNode):
+        return node.value
+    separator = ' ' if node.tag in SEPARATED_TAGS else ''
+    return separator.join(node_text(child) for child in node.children)
+
+def posting_id(posting):
+    return int(posting.partition(',')[0])
+
+def without_pages(postings, page_ids):
+    '''Returns postings (in order of page id) without those of the pages of the given ids
+    '''
+    if len(page_ids) * 32 < len(postings):
+        # a few pages among many (e.g. after editing one page) are found by bisection, rather than checking every posting
+        for page_id in page_ids:
+            i = bisect.bisect_left(postings, page_id, key=posting_id)
+            if i < len(postings) and posting_id(postings[i]) == page_id:
+                del postings[i]
+        return postings
+    page_ids = {str(page_id) for page_id in page_ids}
+    return [posting for posting in postings if posting.partition(',')[0] not in page_ids]
+
+def with_postings(postings, new_postings):
+    '''Returns postings with new_postings merged in, both in order of page id
+    '''
+    if not postings or posting_id(postings[-1]) < posting_id(new_postings[0]):
+        return postings + new_postings
+    for posting in new_postings:
+        bisect.insort(postings, posting, key=posting_id)
+    return postings
+
+def shard_for(token):
+    prefix = token[:SHARD_PREFIX]
+    return prefix if SHARD_NAME_PATTERN.fullmatch(prefix) else OTHER_SHARD
+
+def url_for(rel_path, basepath='/'):
+    '''Returns the url of the page written as rel_path (e.g. 'blog/tom/index.html') within the out directory
+    '''
+    directory = os.path.dirname(rel_path).replace(os.sep, '/')
+    return basepath + (directory + '/' if directory else '')
+
+
+class PageText:
+    """
+    The positions of each token within the text of one page, collected a block at a time as it's converted
+
+    ...
+
+    Attributes
+    ----------
+    positions : dict
+        maps each token to the positions (counted in words from the start of the page) it's found at
+    count : int
+        the number of words seen so far
+
+    Methods
+    -------
+    add(text)
+        Tokenizes the text of the next block of the page
+    joined()
+        Returns the positions of each token as one comma-separated string, e.g. {'tolkien': '0,9,23'}
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.count = 0
+
+    def add(self, text):
+        words = TOKEN_PATTERN.findall(text.lower())
+        positions = self.positions
+        for position, word in enumerate(words, self.count):
+            if len(word) >= MIN_TOKEN_LENGTH:
+                positions.setdefault(word, []).append(position)
+        self.count += len(words)
+
+    def joined(self):
+        # strings (& dicts of nothing else) aren't tracked by the garbage collector, unlike millions of lists of positions
+        # held until the index is updated, & are quicker to send back from worker processes
+        return {token: ','.join(map(str, positions)) for token, positions in self.positions.items()}
+
+
+# the text of each page generated by this process since the last call to take_page_texts, by the path it's written to
+_page_texts = {}
+
+def collect_page_text(dest_path, title, text):
+    _page_texts[dest_path] = (title, text.joined())
+
+def take_page_texts():
+    '''Returns & clears the (title, {token: joined positions}) of each page generated by this process, by the path it's written to
+    '''
+    global _page_texts
+    page_texts, _page_texts = _page_texts, {}
+    return page_texts
+
+
+class SearchIndex:
+    """
+    The inverted index of every page of a site, mapping each token to the pages it's in & its positions within them
+
+    It's written within the out directory as a 'search/pages.json' file, mapping each page's id to its [url, title],
+    & a shard for each prefix of the tokens (e.g. 'search/st.json' holds 'static', 'style', ...), mapping each token
+    to a 'page id,position,position,...' string for each page it's in, in order of page id.
+
+    ...
+
+    Attributes
+    ----------
+    directory : str
+        the out directory the index is written within
+    basepath : str
+        the path the urls of pages are made relative to
+    pages : dict
+        maps the path of each page indexed, relative to directory, to its [id, title, tokens]
+    next_id : int
+        the id of the next page to be indexed; ids aren't reused, so that a page's id never changes while it exists
+
+    Methods
+    -------
+    load(directory, basepath)
+        Returns the index written within directory by the last build, or an empty one
+    update(page_texts, current)
+        Indexes the given pages afresh, & removes every page that isn't current
+    is_empty()
+        Whether or not any page is indexed
+    clear()
+        Deletes every shard & forgets every page
+    """
+
+    def __init__(self, directory, basepath='/', pages=None, next_id=0):
+        self.directory = directory
+        self.basepath = basepath
+        self.pages = pages if pages is not None else {}
+        self.next_id = next_id
+
+    @classmethod
+    def load(cls, directory, basepath='/'):
+        try:
+            with open(os.path.join(directory, SEARCH_STATE)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(directory, basepath)
+        if data.get('version') != SEARCH_VERSION:
+            return cls(directory, basepath)
+        return cls(directory, basepath, pages=data['pages'], next_id=data['next_id'])
+
+    def is_empty(self):
+        return not self.pages
+
+    def shard_path(self, shard):
+        return os.path.join(self.directory, SEARCH_DIR, shard + '.json')
+
+    def update(self, page_texts, current=None):
+        '''Indexes the pages of page_texts (as returned by take_page_texts), replacing what was indexed for them before,
+        & removes every page not in current (the paths of the site's pages, relative to directory), if given
+
+        Only the shards whose tokens changed are read & written again.
+        Returns an (indexed, removed, shards written) tuple of the number of pages & shards affected.
+        '''
+        # the ids of the pages whose postings of each token are dropped, & the new postings of each token
+        dropped = {}
+        added = {}
+        removed = 0
+        ids = {}
+        for dest_path in page_texts:
+            rel_path = os.path.relpath(dest_path, self.directory)
+            old = self.pages.get(rel_path)
+            if old is None:
+                ids[dest_path] = (self.next_id, rel_path)
+                self.next_id += 1
+            else:
+                ids[dest_path] = (old[0], rel_path)
+                for token in old[2]:
+                    dropped.setdefault(token, set()).add(old[0])
+        # pages are indexed in order of id, so that the new postings of each token are too
+        for dest_path in sorted(page_texts, key=ids.get):
+            title, positions = page_texts[dest_path]
+            page_id, rel_path = ids[dest_path]
+            for token, token_positions in positions.items():
+                added.setdefault(token, []).append(f'{page_id},{token_positions}')
+            self.pages[rel_path] = [page_id, title, list(positions)]
+        if current is not None:
+            for rel_path in set(self.pages) - set(current):
+                page_id, title, tokens = self.pages.pop(rel_path)
+                for token in tokens:
+                    dropped.setdefault(token, set()).add(page_id)
+                removed += 1
+        # each shard is read & written once, however many of its tokens changed
+        shards = {}
+        for token in dropped.keys() | added.keys():
+            shards.setdefault(shard_for(token), []).append(token)
+        os.makedirs(os.path.join(self.directory, SEARCH_DIR), exist_ok=True)
+        for shard, tokens in shards.items():
+            self._update_shard(shard, tokens, dropped, added)
+        self._save()
+        return len(page_texts), removed, len(shards)
+
+    def _update_shard(self, shard, tokens, dropped, added):
+        path = self.shard_path(shard)
+        try:
+            with open(path) as file:
+                postings = json.load(file)
+        except (OSError, ValueError):
+            postings = {}
+        # only the postings of the tokens that changed are touched, rather than every posting in the shard
+        for token in tokens:
+            token_postings = postings.get(token, [])
+            if token in dropped:
+                token_postings = without_pages(token_postings, dropped[token])
+            if token in added:
+                token_postings = with_postings(token_postings, added[token])
+            if token_postings:
+                postings[token] = token_postings
+            else:
+                postings.pop(token, None)
+        if postings:
+            write_text_if_changed(path, json.dumps(postings, separators=(',', ':'), sort_keys=True))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _save(self):
+        pages = {page_id: [url_for(rel_path, self.basepath), title] for rel_path, (page_id, title, tokens) in self.pages.items()}
+        write_text_if_changed(os.path.join(self.directory, SEARCH_DIR, SEARCH_PAGES), json.dumps(pages, separators=(',', ':'), sort_keys=True))
+        with open(os.path.join(self.directory, SEARCH_STATE), 'w') as file:
+            # dumped as one string, by the C encoder, rather than streamed to the file a piece at a time
+            file.write(json.dumps({'version': SEARCH_VERSION, 'next_id': self.next_id, 'pages': self.pages}, separators=(',', ':')))
+
+    def clear(self):
+        '''Deletes every shard written within directory, & forgets every page
+        '''
+        search_dir = os.path.join(self.directory, SEARCH_DIR)
+        if os.path.isdir(search_dir):
+            for name in os.listdir(search_dir):
+                os.remove(os.path.join(search_dir, name))
+        self.pages = {}
+        self.next_id = 0
+
+def search_outputs(directory):
+    '''Returns the relative paths of every file written by a SearchIndex within directory, along with its state
+    '''
+    outputs = {SEARCH_STATE}
+    search_dir = os.path.join(directory, SEARCH_DIR)
+    if os.path.isdir(search_dir):
+        outputs.update(os.path.join(SEARCH_DIR, name) for name in os.listdir(search_dir))
+    return outputs
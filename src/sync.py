@@ -0,0 +1,93 @@
+import os
+import shutil
+from manifest import hash_file
+
+def files_match(from_path, to_path, use_hash=False):
+    '''Whether or not the file at to_path is already an up-to-date copy of the file at from_path
+
+    Files are compared by size & modification time, or by the hash of their contents if use_hash is true.
+    '''
+    try:
+        to_stat = os.stat(to_path)
+    except FileNotFoundError:
+        return False
+    from_stat = os.stat(from_path)
+    if from_stat.st_size != to_stat.st_size:
+        return False
+    if (from_stat.st_dev, from_stat.st_ino) == (to_stat.st_dev, to_stat.st_ino):
+        # a hard link to the source is always up to date
+        return True
+    if use_hash:
+        return hash_file(from_path) == hash_file(to_path)
+    return from_stat.st_mtime_ns == to_stat.st_mtime_ns
+
+def copy_file(from_path, to_path, link=False):
+    '''Copies a file, preserving its modification time so that later syncs can tell it is unchanged
+
+    If link is true, a hard link is made instead when the filesystem supports it.
+    Otherwise, the kernel is asked to copy the file's contents itself, which shares the data
+    as a reflink on filesystems that support copy-on-write.
+    '''
+    if os.path.lexists(to_path):
+        os.remove(to_path)
+    if link:
+        try:
+            os.link(from_path, to_path)
+            return
+        except OSError:
+            # hard links aren't possible across devices, or on some filesystems; fall back to copying
+            pass
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(from_path, 'rb') as from_file, open(to_path, 'wb') as to_file:
+                remaining = os.fstat(from_file.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(from_file.fileno(), to_file.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(from_path, to_path)
+                return
+        except OSError:
+            pass
+    shutil.copy2(from_path, to_path)
+
+def sync_dir(from_dir, to_dir, keep=(), use_hash=False, link=False):
+    '''Makes to_dir mirror the contents of from_dir, copying only new or changed files
+
+    Any files within to_dir that don't exist within from_dir are deleted as orphans, unless their
+    path relative to to_dir is in keep (e.g. generated pages, which don't come from from_dir).
+    Returns a (copied, deleted, unchanged) tuple of the number of files affected.
+    '''
+    # check that the from_dir is valid and has files to work with
+    if not os.path.exists(from_dir):
+        raise ValueError(f'Copy-From directory "{from_dir}" does not exist.')
+    copied = deleted = unchanged = 0
+    from_files = set()
+    from_dirs = set()
+    for dir_path, dir_names, file_names in os.walk(from_dir):
+        rel_dir = os.path.relpath(dir_path, from_dir)
+        from_dirs.add(rel_dir)
+        os.makedirs(os.path.normpath(os.path.join(to_dir, rel_dir)), exist_ok=True)
+        for name in file_names:
+            rel_path = os.path.normpath(os.path.join(rel_dir, name))
+            from_files.add(rel_path)
+            from_path = os.path.join(from_dir, rel_path)
+            to_path = os.path.join(to_dir, rel_path)
+            if files_match(from_path, to_path, use_hash):
+                unchanged += 1
+            else:
+                copy_file(from_path, to_path, link)
+                copied += 1
+    # walk bottom-up, so that directories emptied of orphans can be removed as well
+    for dir_path, dir_names, file_names in os.walk(to_dir, topdown=False):
+        rel_dir = os.path.relpath(dir_path, to_dir)
+        for name in file_names:
+            rel_path = os.path.normpath(os.path.join(rel_dir, name))
+            if rel_path not in from_files and rel_path not in keep:
+                os.remove(os.path.join(dir_path, name))
+                deleted += 1
+        if rel_dir not in from_dirs and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    return copied, deleted, unchanged
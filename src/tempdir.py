@@ -0,0 +1,46 @@
+'''A base for tests that write & read files within a temporary directory, which is deleted once each test is done
+'''
+import os
+import tempfile
+import unittest
+
+class TempDirTestCase(unittest.TestCase):
+    """
+    A TestCase given a fresh temporary directory for each test, with helpers for the files within it
+
+    ...
+
+    Attributes
+    ----------
+    tmp : TemporaryDirectory
+        the temporary directory, deleted once the test (& any tearDown) is done
+    root : str
+        the directory that relative paths are taken within; the temporary directory, unless a subclass's setUp changes it
+
+    Methods
+    -------
+    path(rel_path)
+        Returns the path of rel_path within root
+    write(rel_path, text)
+        Writes text as the file at rel_path, making any directories above it
+    read(rel_path)
+        Returns the text of the file at rel_path
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, text):
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def read(self, rel_path):
+        with open(self.path(rel_path)) as file:
+            return file.read()
@@ -0,0 +1,116 @@
+import os
+import re
+from minify import minify_html
+
+# matches a slot within a template, such as '{{ Title }}' or '{{ Content }}'
+SLOT_PATTERN = re.compile(r'\{\{ (\w+) \}\}')
+
+class Template:
+    """
+    An HTML template compiled into its literal segments and the named slots between them
+
+    ...
+
+    Attributes
+    ----------
+    segments : str[]
+        the literal HTML of the template, split at each slot; there is always one more segment than there are slots
+    slots : str[]
+        the name of each slot in the order they appear, e.g. 'Title' for '{{ Title }}'
+    depths : int[]
+        the depth of each slot, in levels of two-space indentation of its line, that pretty-printed HTMLNodes are indented relative to
+    basepath : str
+        the path that root-relative links & images, in both the template and the HTMLNodes filling its slots, are made relative to
+    saved : int
+        the number of bytes minifying the template saved, if it was minified
+
+    Methods
+    -------
+    render(values, pretty, minifier)
+        Returns the template with each slot filled by its value, in a single join
+    write(file, values, pretty, minifier)
+        Streams the template into a file, with each slot filled by its value
+    """
+
+    def __init__(self, text, basepath='/', minify=None):
+        self.saved = 0
+        if minify is not None:
+            # minified once, as it's compiled, rather than as each page is written
+            minified = minify_html(text, minify)
+            self.saved = len(text.encode()) - len(minified.encode())
+            text = minified
+        parts = SLOT_PATTERN.split(text)
+        # re.split places each captured slot name between the literal segments surrounding it
+        self.segments = [with_basepath(segment, basepath) for segment in parts[0::2]]
+        self.slots = parts[1::2]
+        self.depths = [indent_depth(text, match.start()) for match in SLOT_PATTERN.finditer(text)]
+        self.basepath = basepath
+
+    def depth_of(self, slot):
+        '''Returns the depth of the first slot of the given name, or 0 if there is none
+        '''
+        return self.depths[self.slots.index(slot)] if slot in self.slots else 0
+
+    def _fill(self, values):
+        # slots without a value are left in the output untouched
+        return [values.get(slot, f'{{{{ {slot} }}}}') for slot in self.slots]
+
+    def render(self, values, pretty=False, minifier=None):
+        '''Returns the template with each slot filled by its value from the values dict
+
+        HTMLNode values are converted with to_html, pretty printed at the depth of their slot if pretty is True,
+        or minified by minifier if one is given.
+        '''
+        parts = [self.segments[0]]
+        for value, depth, segment in zip(self._fill(values), self.depths, self.segments[1:]):
+            parts.append(value if isinstance(value, str) else value.to_html(basepath=self.basepath, pretty=pretty, depth=depth, minifier=minifier))
+            parts.append(segment)
+        return ''.join(parts)
+
+    def write(self, file, values, pretty=False, minifier=None):
+        '''Writes the template into file with each slot filled by its value from the values dict
+
+        HTMLNode values are streamed into the file with write_html, rather than converted to a string first.
+        '''
+        file.write(self.segments[0])
+        for value, depth, segment in zip(self._fill(values), self.depths, self.segments[1:]):
+            if isinstance(value, str):
+                file.write(value)
+            else:
+                value.write_html(file, basepath=self.basepath, pretty=pretty, depth=depth, minifier=minifier)
+            file.write(segment)
+
+
+def indent_depth(text, position):
+    '''Returns the depth, in levels of two-space indentation, of the line of text containing position
+    '''
+    line = text[text.rfind('\n', 0, position) + 1:position]
+    return (len(line) - len(line.lstrip(' '))) // 2
+
+def with_basepath(html, basepath):
+    '''Rewrites the root-relative links & images within html to be relative to basepath instead
+    '''
+    if basepath == '/':
+        return html
+    return html.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
+
+
+# compiled templates, by path, basepath, & minify options, along with the modification time of the file they were compiled from
+_template_cache = {}
+
+def load_template(template_path, basepath='/', minify=None):
+    '''Returns the compiled Template for the file at template_path, with its links & images made relative to basepath
+
+    If Minify options are given, the template is minified with them.
+
+    Templates are only read & compiled again if their file was modified since it was last loaded,
+    so that the many pages sharing a template don't each pay for reading it.
+    '''
+    mtime = os.stat(template_path).st_mtime_ns
+    cached = _template_cache.get((template_path, basepath, minify))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(template_path, 'r') as file:
+        template = Template(file.read(), basepath, minify)
+    _template_cache[(template_path, basepath, minify)] = (mtime, template)
+    return template
@@ -0,0 +1,21 @@
+import unittest
+
+from blocks import *
+
+class TestClassifyBlock(unittest.TestCase):
+    def test_returns_type_and_lines(self):
+        block_type, lines = classify_block("- this is a list\n- with items")
+        self.assertEqual(block_type, BlockType.ULIST)
+        self.assertEqual(lines, ["- this is a list", "- with items"])
+
+    def test_agrees_with_block_to_block_type(self):
+        for md_block in ["## a heading", "```\ncode\n```", "> a\n> quote", "1. one\n2. two", "1. one\n3. three", "a # not heading"]:
+            self.assertEqual(classify_block(md_block)[0], block_to_block_type(md_block))
+
+    def test_heading_only_within_first_seven_characters(self):
+        self.assertEqual(block_to_block_type("###### six"), BlockType.HEADING)
+        self.assertEqual(block_to_block_type("paragraph with a ## later on"), BlockType.PARAGRAPH)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import io
+import os
+import json
+import unittest
+import contextlib
+
+from builder import *
+from changes import load_changes
+from minify import Minify
+from tempdir import TempDirTestCase
+
+class TestBuildSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('content/index.md', '# Home\n\n[a post](/blog/tom)')
+        self.write('content/blog/tom/index.md', '# Tom\n\nSome **bold** text')
+        self.write('static/styles.css', 'body {}')
+        self.write('template.html', '<link href="/styles.css"><title>{{ Title }}</title>\n  <main>{{ Content }}</main>')
+
+    def build(self, out_dir='site', **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return build_site(self.path('content'), self.path('static'), self.path(out_dir), self.path('template.html'), **options)
+
+    def test_builds_pages_and_static_files(self):
+        summary = self.build(basepath='/docs/')
+        self.assertEqual(summary['generated'], 2)
+        self.assertEqual(summary['static'], (1, 0, 0))
+        self.assertEqual(self.read('site/styles.css'), 'body {}')
+        self.assertEqual(
+            self.read('site/index.html'),
+            '<link href="/docs/styles.css"><title>Home</title>\n  <main><div><h1>Home</h1><p><a href="/docs/blog/tom">a post</a></p></div></main>',
+        )
+
+    def test_rebuild_skips_unchanged_pages(self):
+        self.build()
+        self.write('content/blog/tom/index.md', '# Tom\n\nSome _italic_ text')
+        summary = self.build()
+        self.assertEqual((summary['generated'], summary['skipped']), (1, 1))
+        self.assertIn('<i>italic</i>', self.read('site/blog/tom/index.html'))
+
+    def test_forced_rebuild_leaves_unchanged_pages_untouched(self):
+        self.build()
+        mtime = os.stat(self.path('site/index.html')).st_mtime_ns
+        self.write('content/blog/tom/index.md', '# Tom\n\nSome _italic_ text')
+        summary = self.build(force=True)
+        self.assertEqual((summary['generated'], summary['written'], summary['unchanged']), (2, 1, 1))
+        self.assertEqual(os.stat(self.path('site/index.html')).st_mtime_ns, mtime)
+
+    def test_changed_options_leave_unchanged_pages_untouched(self):
+        self.build()
+        mtimes = [os.stat(self.path(page)).st_mtime_ns for page in ('site/index.html', 'site/blog/tom/index.html')]
+        summary = self.build(search=True)
+        self.assertEqual((summary['generated'], summary['written'], summary['static']), (2, 0, (0, 0, 1)))
+        self.assertEqual([os.stat(self.path(page)).st_mtime_ns for page in ('site/index.html', 'site/blog/tom/index.html')], mtimes)
+
+    def test_records_the_outputs_each_build_changed(self):
+        self.assertEqual(self.build()['changes'], (3, 0, 0))
+        self.write('content/blog/tom/index.md', '# Tom\n\nSome _italic_ text')
+        os.remove(self.path('static/styles.css'))
+        self.assertEqual(self.build(force=True)['changes'], (0, 1, 1))
+        self.assertEqual(list(load_changes(self.path('site'))['modified']), ['blog/tom/index.html'])
+
+    def test_indexes_pages_for_search_as_they_change(self):
+        summary = self.build(search=True, jobs=2)
+        self.assertEqual(summary['search'][:2], (2, 0))
+        self.assertEqual(json.loads(self.read('site/search/pages.json')), {'0': ['/blog/tom/', 'Tom'], '1': ['/', 'Home']})
+        self.write('content/blog/tom/index.md', '# Tom\n\nSome _italic_ text')
+        self.assertEqual(self.build(search=True)['search'][:2], (1, 0))
+        self.assertEqual(json.loads(self.read('site/search/it.json')), {'italic': ['0,2']})
+
+    def test_precompresses_output_files(self):
+        self.write('static/styles.css', 'body { margin: 0 }\n' * 50)
+        self.assertEqual(self.build(precompress=('gz',))['precompressed'], (1, 0, 0))
+        self.assertTrue(os.path.exists(self.path('site/styles.css.gz')))
+        # a deleted page's directory is removed along with its sidecar
+        self.write('content/blog/tom/index.md', '# Tom\n\n' + 'Some **bold** text\n\n' * 50)
+        self.build(precompress=('gz',))
+        self.assertTrue(os.path.exists(self.path('site/blog/tom/index.html.gz')))
+        os.remove(self.path('content/blog/tom/index.md'))
+        self.build(precompress=('gz',))
+        self.assertFalse(os.path.exists(self.path('site/blog')))
+
+    def test_pages_use_the_nearest_template(self):
+        self.build()
+        self.write('content/blog/template.html', '<h6>{{ Title }}</h6>{{ Content }}')
+        summary = self.build()
+        self.assertEqual((summary['generated'], summary['skipped']), (1, 1))
+        self.assertEqual(self.read('site/blog/tom/index.html'), '<h6>Tom</h6><div><h1>Tom</h1><p>Some <b>bold</b> text</p></div>')
+
+    def test_sites_built_back_to_back_keep_their_own_options(self):
+        self.build(pretty=True)
+        pretty = self.read('site/index.html')
+        summary = self.build('plain')
+        self.assertEqual(summary['generated'], 2)
+        self.assertIn('<main><div>\n    <h1>Home</h1>', pretty)
+        self.assertIn('<main><div><h1>Home</h1>', self.read('plain/index.html'))
+
+    def test_render_cache_is_used_only_with_a_cache_dir(self):
+        self.build(cache_dir=self.path('cache'))
+        summary = self.build(force=True, cache_dir=self.path('cache'))
+        self.assertEqual(summary['cache_stats']['render cache'], (4, 0))
+        self.assertEqual(self.build(force=True)['cache_stats']['render cache'], (0, 0))
+
+
+class TestBuildSites(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, posts in (('small', 1), ('large', 3)):
+            self.write(f'{name}/content/index.md', f'# {name}\n\n[a post](/blog/0)')
+            for i in range(posts):
+                self.write(f'{name}/content/blog/{i}/index.md', f'# Post {i}\n\n' + 'Some **bold** text\n\n' * 10)
+            self.write(f'{name}/static/styles.css', 'body {}')
+            self.write(f'{name}/template.html', '<title>{{ Title }}</title>{{ Content }}')
+        self.write('sites.json', json.dumps([{'root': 'small'}, {'root': 'large', 'basepath': '/large/'}]))
+
+    def build(self, **options):
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            summaries = build_sites(load_batch(self.path('sites.json'), cache=False), **options)
+        return summaries, log.getvalue()
+
+    def test_builds_every_site_with_its_own_options(self):
+        summaries, log = self.build()
+        self.assertEqual([summary['generated'] for summary in summaries], [2, 4])
+        self.assertIn('href="/blog/0"', self.read('small/docs/index.html'))
+        self.assertIn('href="/large/blog/0"', self.read('large/docs/index.html'))
+
+    def test_largest_site_is_generated_first(self):
+        summaries, log = self.build()
+        first = log.index('Generating page')
+        self.assertLess(log.index('large', first), log.index('small', first))
+
+    def test_reads_each_sites_options(self):
+        self.write('sites.json', json.dumps([{'root': 'small', 'minify': ['comments'], 'precompress': ['gz'], 'cache_size': 64}]))
+        self.assertEqual(read_batch(self.path('sites.json')), [
+            (self.path('small'), {'minify': Minify(drop_comments=True), 'precompress': ['gz'], 'cache_size': 64 << 20}),
+        ])
+
+    def test_rejects_invalid_batch_files(self):
+        path = self.path('sites.json')
+        for entries in ('[{"root": "small",', '{"root": "small"}', '[{"basepath": "/"}]', '[{"root": "small", "minfy": true}]',
+                        '[{"root": "small", "minify": "comments"}]', '[{"root": "small", "cache_size": true}]', '[{"root": "small", "precompress": ["br"]}]'):
+            self.write('sites.json', entries)
+            with self.assertRaises(ValueError):
+                read_batch(path)
+        with self.assertRaises(ValueError):
+            read_batch(self.path('missing.json'))
+
+    def test_shares_worker_processes(self):
+        summaries, log = self.build(jobs=2)
+        self.assertEqual([summary['generated'] for summary in summaries], [2, 4])
+        self.assertEqual(self.read('large/docs/blog/2/index.html').count('<b>bold</b>'), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import json
+import filecmp
+import unittest
+
+from changes import *
+from tempdir import TempDirTestCase
+
+class TestRecordChanges(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.deployed = self.path('deployed')
+        self.docs = self.root = self.path('docs')
+        self.write('index.html', '<p>home</p>')
+        self.write('blog/tom/index.html', '<p>tom</p>')
+        self.write('styles.css', 'body {}')
+        self.write('.nojekyll', '')
+        self.write(MANIFEST_NAME, '{}')
+
+    def test_first_build_adds_every_output(self):
+        changes = record_changes(self.docs)
+        self.assertEqual(set(changes['added']), {'index.html', 'blog/tom/index.html', 'styles.css', '.nojekyll'})
+        self.assertEqual(changes['added']['styles.css'], hash_file(self.path('styles.css')))
+        self.assertEqual((changes['modified'], changes['deleted']), ({}, {}))
+        self.assertEqual(json.loads(self.read(CHANGES_NAME)), {'version': CHANGES_VERSION, **changes})
+
+    def test_records_added_modified_and_deleted_outputs(self):
+        record_changes(self.docs)
+        old_hash = hash_file(self.path('blog/tom/index.html'))
+        self.write('index.html', '<p>home again</p>')
+        self.write('blog/ann/index.html', '<p>ann</p>')
+        os.remove(self.path('blog/tom/index.html'))
+        changes = record_changes(self.docs)
+        self.assertEqual(changes, {
+            'added': {'blog/ann/index.html': hash_file(self.path('blog/ann/index.html'))},
+            'modified': {'index.html': hash_file(self.path('index.html'))},
+            'deleted': {'blog/tom/index.html': old_hash},
+        })
+        self.assertEqual(load_changes(self.docs), changes)
+
+    def test_rewriting_the_same_contents_is_no_change(self):
+        record_changes(self.docs)
+        self.write('styles.css', 'body {}')
+        self.assertEqual(record_changes(self.docs), {'added': {}, 'modified': {}, 'deleted': {}})
+
+    def test_reuses_hashes_of_outputs_with_the_same_stats(self):
+        outputs = scan_outputs(self.docs)
+        outputs['styles.css'][2] = 'not really a hash'
+        self.assertEqual(scan_outputs(self.docs, outputs, jobs=2)['styles.css'][2], 'not really a hash')
+
+    def test_applying_changes_mirrors_the_build(self):
+        record_changes(self.docs)
+        self.assertEqual(apply_changes(self.docs, self.deployed), (4, 0))
+        self.write('index.html', '<p>home again</p>')
+        os.remove(self.path('blog/tom/index.html'))
+        record_changes(self.docs)
+        self.assertEqual(apply_changes(self.docs, self.deployed), (1, 1))
+        self.assertEqual(sorted(os.listdir(self.deployed)), ['.nojekyll', 'index.html', 'styles.css'])
+        self.assertTrue(filecmp.cmp(self.path('index.html'), os.path.join(self.deployed, 'index.html'), shallow=False))
+
+    def test_refuses_to_apply_outputs_changed_since_the_build(self):
+        record_changes(self.docs)
+        self.write('index.html', '<p>edited by hand</p>')
+        with self.assertRaises(ValueError):
+            apply_changes(self.docs, self.deployed)
+
+
+if __name__ == "__main__":
+    unittest.main()
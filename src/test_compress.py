@@ -0,0 +1,59 @@
+import os
+import gzip
+import lzma
+import unittest
+
+from compress import *
+from tempdir import TempDirTestCase
+
+class TestPrecompressDir(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = self.root
+        self.write('index.html', '<p>hello</p>' * 100)
+        self.write('styles.css', 'body { margin: 0; }\n' * 50)
+        self.write('images/tom.png', 'not really a png' * 100)
+        self.write('tiny.css', 'p {}')
+
+    def test_writes_sidecars_of_compressible_files(self):
+        self.assertEqual(precompress_dir(self.docs, ('gz', 'xz'), threads=2), (2, 0, 0))
+        with gzip.open(self.path('index.html.gz'), 'rt') as file:
+            self.assertEqual(file.read(), '<p>hello</p>' * 100)
+        with lzma.open(self.path('styles.css.xz'), 'rt') as file:
+            self.assertEqual(file.read(), 'body { margin: 0; }\n' * 50)
+        self.assertFalse(os.path.exists(self.path('images/tom.png.gz')))
+        self.assertFalse(os.path.exists(self.path('tiny.css.gz')))
+        self.assertEqual(precompressed_outputs(self.docs), {PRECOMPRESS_INDEX, 'index.html.gz', 'index.html.xz', 'styles.css.gz', 'styles.css.xz'})
+
+    def test_sidecars_are_reproducible(self):
+        precompress_dir(self.docs)
+        with open(self.path('index.html.gz'), 'rb') as file:
+            first = file.read()
+        self.assertEqual(compress_bytes(('<p>hello</p>' * 100).encode(), 'gz'), first)
+
+    def test_skips_unchanged_files(self):
+        precompress_dir(self.docs)
+        self.write('index.html', '<p>goodbye</p>' * 100)
+        self.assertEqual(precompress_dir(self.docs), (1, 1, 0))
+        self.assertEqual(precompress_dir(self.docs), (0, 2, 0))
+
+    def test_removes_sidecars_of_deleted_files(self):
+        precompress_dir(self.docs, ('gz', 'xz'))
+        os.remove(self.path('styles.css'))
+        self.assertEqual(precompress_dir(self.docs, ('gz',)), (1, 0, 3))
+        self.assertEqual(sorted(name for name in os.listdir(self.docs) if name.endswith(('.gz', '.xz'))), ['index.html.gz'])
+
+    def test_removes_directories_left_empty(self):
+        self.write('contact/index.html', '<p>contact</p>' * 100)
+        precompress_dir(self.docs)
+        os.remove(self.path('contact/index.html'))
+        self.assertEqual(precompress_dir(self.docs), (0, 2, 1))
+        self.assertFalse(os.path.exists(self.path('contact')))
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            precompress_dir(self.docs, ('br',))
+
+
+if __name__ == "__main__":
+    unittest.main()
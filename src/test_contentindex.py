@@ -0,0 +1,40 @@
+import os
+import unittest
+
+from contentindex import *
+from tempdir import TempDirTestCase
+
+class TestContentIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.path('content')
+        for rel_path in ['index.md', 'blog/index.md', 'blog/template.html', 'blog/tom/index.md', 'blog/tom/images/tom.png',
+                         'blog/tom/extra/deeper/index.md', 'contact/index.md', 'contact/template.html', 'notes/notindex.md']:
+            self.write(rel_path, rel_path)
+        self.index = ContentIndex(self.root, 'template.html')
+
+    def test_finds_every_page(self):
+        expected = ['index.md', 'blog/index.md', 'blog/tom/index.md', 'blog/tom/extra/deeper/index.md', 'contact/index.md']
+        self.assertEqual(sorted(self.index.pages), sorted(map(self.path, expected)))
+
+    def test_finds_every_template(self):
+        self.assertEqual(self.index.templates, {
+            self.path('blog'): self.path('blog/template.html'),
+            self.path('contact'): self.path('contact/template.html'),
+        })
+
+    def test_resolves_the_nearest_template(self):
+        self.assertEqual(self.index.template_for(self.path('index.md')), 'template.html')
+        self.assertEqual(self.index.template_for(self.path('blog/index.md')), self.path('blog/template.html'))
+        self.assertEqual(self.index.template_for(self.path('blog/tom/index.md')), self.path('blog/template.html'))
+        self.assertEqual(self.index.template_for(self.path('blog/tom/extra/deeper/index.md')), self.path('blog/template.html'))
+        self.assertEqual(self.index.template_for(self.path('contact/index.md')), self.path('contact/template.html'))
+
+    def test_records_stats(self):
+        stat = os.stat(self.path('blog/tom/index.md'))
+        self.assertEqual(self.index.stats[self.path('blog/tom/index.md')], (stat.st_mtime_ns, stat.st_size))
+        self.assertEqual(len(self.index.stats), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -195,6 +195,49 @@ class TestConversionsOnNodes(unittest.TestCase):
         ]
         self.assertEqual(result, answer_key)
 
+    def test_text_to_textnodes_matches_chained_splits(self):
+        texts = [
+            '',
+            'Just plain text here',
+            '![image](/a.png)[link](/b)',
+            'text with *italics*, _more italics_, and `some code`',
+            '[broken link](missing closing parenthesis and ![an image](/c.png) after',
+            '!![image](/a.png) and ![not an image] (/b)',
+            # an image overlapping the url of a link takes precedence over it
+            '[](![)\n**a**](x\n)',
+            '[a](![b](c)',
+        ]
+        for text in texts:
+            self.assertEqual(text_to_textnodes(text), self.chained_splits(text), text)
+
+    def chained_splits(self, text):
+        old_nodes = [TextNode(text, TextType.TEXT)]
+        old_nodes = split_nodes_image(old_nodes)
+        old_nodes = split_nodes_link(old_nodes)
+        old_nodes = split_nodes_delimiter(old_nodes, '**', TextType.BOLD)
+        old_nodes = split_nodes_delimiter(old_nodes, '*', TextType.ITALIC)
+        old_nodes = split_nodes_delimiter(old_nodes, '_', TextType.ITALIC)
+        old_nodes = split_nodes_delimiter(old_nodes, '`', TextType.CODE)
+        return old_nodes
+
+    def test_text_to_textnodes_matches_chained_splits_of_random_text(self):
+        import random
+        rng = random.Random(0)
+        pieces = ['[', ']', '(', ')', '!', '![', '](', '**', '*', '_', '`', 'a', 'x', ' ', '\n']
+        for _ in range(5000):
+            text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 14)))
+            try:
+                expected = self.chained_splits(text)
+            except Exception:
+                with self.assertRaises(Exception):
+                    text_to_textnodes(text)
+                continue
+            self.assertEqual(text_to_textnodes(text), expected, text)
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        with self.assertRaises(Exception):
+            text_to_textnodes('This is [a link](/x) with an **unclosed bold')
+
 class TestMarkdownToHTML(unittest.TestCase):
     def test_markdown_to_blocks(self):
         md = """
@@ -396,5 +439,68 @@ the **same** even with inline stuff
         )
 
 
+class TestInlineCaches(unittest.TestCase):
+    def test_repeated_text_shares_leaves(self):
+        text = 'Shared **footer** with a [link](/about)'
+        first = generate_leaf_nodes_from_block_text(text)
+        second = generate_leaf_nodes_from_block_text(text)
+        self.assertIsNot(first, second)
+        self.assertTrue(all(a is b for a, b in zip(first, second)))
+        self.assertEqual(text_to_textnodes(text), text_to_textnodes(text))
+
+    def test_shared_leaves_render_the_same_in_any_tree(self):
+        leaves = generate_leaf_nodes_from_block_text('Some **bold** text')
+        deep = ParentNode('h2', leaves)
+        shallow = ParentNode('h3', generate_leaf_nodes_from_block_text('Some **bold** text'))
+        self.assertEqual(deep.to_html(pretty=True, depth=4), '<h2>\n          Some \n          <b>bold</b>\n           text\n        </h2>')
+        self.assertEqual(shallow.to_html(pretty=True), '<h3>\n  Some \n  <b>bold</b>\n   text\n</h3>')
+
+    def test_disabled_cache_gives_same_result(self):
+        md = '# Title\n\n- Home\n- Home\n\nSome _italic_ & `code`'
+        cached = markdown_to_html_node(md).to_html()
+        set_inline_cache_size(0)
+        try:
+            self.assertEqual(markdown_to_html_node(md).to_html(), cached)
+        finally:
+            set_inline_cache_size(INLINE_CACHE_SIZE)
+
+
+class TestStreamingConversions(unittest.TestCase):
+    def test_iter_markdown_blocks_matches_markdown_to_blocks(self):
+        import io
+        import random
+        rng = random.Random(0)
+        pieces = ['a', 'b c', '\n', '\n\n', '\n\n\n', ' ', '- item', '```']
+        for _ in range(300):
+            md = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            for chunk_size in (1, 2, 3, 7, 1 << 16):
+                self.assertEqual(list(iter_markdown_blocks(io.StringIO(md), chunk_size)), markdown_to_blocks(md), (md, chunk_size))
+
+    def test_iter_markdown_blocks_of_a_block_spanning_many_chunks(self):
+        import io
+        # a 2 MB block read in 8192 chunks; were the block carried over as one string, it would be copied & searched
+        # again as each chunk was read, gigabytes of text in all
+        md = '# Title\n\n' + 'word\n' * 400000 + '\n\nLast'
+        self.assertEqual(list(iter_markdown_blocks(io.StringIO(md), 256)), markdown_to_blocks(md))
+
+    def emit(self, node, pretty):
+        fragments = []
+        node._emit_html(fragments.append, pretty=pretty, basepath='/site/')
+        return ''.join(fragments)
+
+    def test_markdown_stream_matches_markdown_to_html_node(self):
+        import io
+        md = '# Title\n\nSome **bold** & _italic_ text\n\n- one\n- [two](/two)\n\n```\ncode\n```'
+        # a document of a single block isn't indented when pretty printed, so it's checked separately
+        for doc in (md, '# Only a title'):
+            for pretty in (False, True):
+                self.assertEqual(self.emit(MarkdownStream(io.StringIO(doc)), pretty), self.emit(markdown_to_html_node(doc), pretty))
+
+    def test_markdown_stream_of_empty_document(self):
+        import io
+        with self.assertRaises(ValueError):
+            MarkdownStream(io.StringIO('\n\n')).to_html()
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
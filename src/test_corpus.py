@@ -0,0 +1,25 @@
+import os
+import random
+import unittest
+
+from conversions import markdown_to_html_node
+from generation import extract_title
+from corpus import *
+from tempdir import TempDirTestCase
+
+class TestCorpus(TempDirTestCase):
+    def test_documents_convert(self):
+        rng = random.Random(0)
+        for md in [document(rng, 50), document_of_size(rng, 20000), link_heavy_list(rng, 50)]:
+            extract_title(md)
+            self.assertTrue(markdown_to_html_node(md).to_html().startswith('<div><h1>'))
+
+    def test_write_corpus(self):
+        self.assertEqual(write_corpus(self.root, 'nested', 3), 4)
+        self.assertTrue(os.path.exists(self.path('deep/deep/deep/index.md')))
+        with self.assertRaises(ValueError):
+            write_corpus(self.root, 'unknown', 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
+import io
 import unittest
+import contextlib
 
 from generation import *
+from tempdir import TempDirTestCase
 
 class TestHeaderExtraction(unittest.TestCase):
     def test_wrong_line(self):
@@ -15,3 +18,46 @@ class TestHeaderExtraction(unittest.TestCase):
         result = extract_title('# This is a markdown file whose h1 header line correctly includes the whitespace required for header syntax in markdown.\nIt should return no errors.')
         self.assertEqual(result, 'This is a markdown file whose h1 header line correctly includes the whitespace required for header syntax in markdown.')
 
+
+class TestBasepath(TempDirTestCase):
+    def generate(self, md, basepath, stream=False):
+        self.write('index.md', md)
+        self.write('template.html', '<link href="/styles.css"><title>{{ Title }}</title>{{ Content }}')
+        generate_page(self.path('index.md'), self.path('template.html'), self.path('index.html'), basepath=basepath, stream=stream)
+        return self.read('index.html')
+
+    def test_same_as_replacing_over_the_whole_page(self):
+        md = '# Home\n\n![tom](/images/tom.png) and [a post](/blog/tom)\n\n- [external](https://www.boot.dev)\n- [root](/)'
+        expected = self.generate(md, '/').replace('href="/', 'href="/site/').replace('src="/', 'src="/site/')
+        self.assertEqual(self.generate(md, '/site/'), expected)
+
+    def test_literal_html_in_code_is_untouched(self):
+        md = '# Code\n\n[a post](/blog/tom)\n\n```\n<a href="/blog">link</a><img src="/tom.png">\n```'
+        self.assertEqual(
+            self.generate(md, '/site/'),
+            '<link href="/site/styles.css"><title>Code</title><div><h1>Code</h1><p><a href="/site/blog/tom">a post</a></p><pre><code><a href="/blog">link</a><img src="/tom.png">\n</code></pre></div>',
+        )
+
+    def test_streamed_page_is_the_same(self):
+        md = '# Home\n\n![tom](/images/tom.png) and [a post](/blog/tom)\n\n\n\n- [external](https://www.boot.dev)\n- [root](/)\n'
+        for basepath in ('/', '/site/'):
+            self.assertEqual(self.generate(md, basepath, stream=True), self.generate(md, basepath))
+
+    def test_streamed_page_requires_a_title(self):
+        with self.assertRaises(Exception):
+            self.generate('No title\n\n# Home', '/', stream=True)
+
+class TestQuietGeneration(TempDirTestCase):
+    def test_returns_log_instead_of_printing(self):
+        self.write('index.md', '# Hello\n\nSome **bold** text')
+        self.write('template.html', '<title>{{ Title }}</title>{{ Content }}')
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            log, profile, cache_stats, written, page_texts = generate_page_quietly((self.path('index.md'), self.path('template.html'), self.path('docs/index.html'), '/'))
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertIn('Generating page from', log)
+        self.assertIsNone(profile)
+        self.assertTrue(written)
+        self.assertEqual(page_texts, {})
+        self.assertEqual(set(cache_stats), {'text_to_textnodes', 'leaf nodes', 'render cache'})
+        self.assertEqual(self.read('docs/index.html'), '<title>Hello</title><div><h1>Hello</h1><p>Some <b>bold</b> text</p></div>')
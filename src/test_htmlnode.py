@@ -105,6 +105,57 @@ class TestHTMLNode(unittest.TestCase):
         )
         
 
+    def test_write_html_matches_to_html(self):
+        import io
+        a_node = LeafNode("a", "Get studying now!", props={"href" : "https://www.boot.dev"})
+        img_node = LeafNode("img", "", props={"src" : "/images/tom.png", "alt" : "Tom"})
+        ul_node = ParentNode("ul", [ParentNode("li", [a_node]), ParentNode("li", [LeafNode(None, "text"), img_node])])
+        body_parent_node = ParentNode("body", [LeafNode("h1", "Backend Languages"), ul_node], props={"class" : "dark"})
+        file = io.StringIO()
+        body_parent_node.write_html(file)
+        self.assertEqual(file.getvalue(), body_parent_node.to_html())
+        self.assertEqual(
+            file.getvalue(),
+            '<body class="dark"><h1>Backend Languages</h1><ul><li><a href="https://www.boot.dev">Get studying now!</a></li><li>text<img src="/images/tom.png" alt="Tom"></li></ul></body>'
+        )
+
+
+    def test_props_respect_basepath(self):
+        a_node = LeafNode("a", "Home", props={"href" : "/blog/tom", "title" : "/not/a/url"})
+        img_node = LeafNode("img", "", props={"src" : "/images/tom.png", "alt" : "Tom"})
+        external_node = LeafNode("a", "Boot.dev", props={"href" : "https://www.boot.dev"})
+        p_node = ParentNode("p", [a_node, img_node, external_node])
+        self.assertEqual(
+            p_node.to_html(basepath="/site/"),
+            '<p><a href="/site/blog/tom" title="/not/a/url">Home</a><img src="/site/images/tom.png" alt="Tom"><a href="https://www.boot.dev">Boot.dev</a></p>'
+        )
+
+    def test_nodes_are_compact(self):
+        leaf_node = LeafNode("b", "bold")
+        parent_node = ParentNode("p", [leaf_node])
+        for node in [HTMLNode("div"), leaf_node, parent_node]:
+            self.assertFalse(hasattr(node, "__dict__"))
+        # tags built at runtime share the interned string of the same tag
+        self.assertIs(ParentNode("".join(["h", "2"]), [leaf_node]).tag, ParentNode("h2", [leaf_node]).tag)
+
+    def test_void_tags_close_themselves(self):
+        self.assertEqual(LeafNode("br", "ignored").to_html(), "<br>")
+        self.assertEqual(LeafNode("b", "bold").to_html(), "<b>bold</b>")
+
+    def test_pretty_indentation_follows_depth(self):
+        node = ParentNode("div", [ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")]), ParentNode("li", [LeafNode(None, "two")])]), LeafNode("p", "text")])
+        self.assertEqual(node.to_html(pretty=True), "<div>\n  <ul>\n    <li>one</li>\n    <li>two</li>\n  </ul>\n  <p>text</p>\n</div>")
+        self.assertEqual(node.to_html(pretty=True, depth=2), "<div>\n      <ul>\n        <li>one</li>\n        <li>two</li>\n      </ul>\n      <p>text</p>\n    </div>")
+        self.assertEqual(node.to_html(), "<div><ul><li>one</li><li>two</li></ul><p>text</p></div>")
+
+    def test_pretty_and_plain_render_concurrently(self):
+        from concurrent.futures import ThreadPoolExecutor
+        node = ParentNode("div", [ParentNode("h2", [LeafNode(None, "A "), LeafNode("b", "bold")]) for _ in range(200)])
+        expected = {True: node.to_html(pretty=True), False: node.to_html()}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda pretty: (pretty, node.to_html(pretty=pretty)), [True, False] * 20))
+        for pretty, html in results:
+            self.assertEqual(html, expected[pretty])
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import unittest
+
+from lrucache import *
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.computed = []
+        self.cache = LRUCache(self.compute, maxsize=2)
+
+    def compute(self, key):
+        self.computed.append(key)
+        return key.upper()
+
+    def test_repeated_keys_are_computed_once(self):
+        self.assertEqual([self.cache('a'), self.cache('a'), self.cache('b'), self.cache('a')], ['A', 'A', 'B', 'A'])
+        self.assertEqual(self.computed, ['a', 'b'])
+        self.assertEqual(self.cache.take_stats(), (2, 2))
+        self.assertEqual(self.cache.take_stats(), (0, 0))
+
+    def test_evicts_least_recently_used(self):
+        self.cache('a')
+        self.cache('b')
+        self.cache('a')
+        self.cache('c')
+        self.assertEqual(len(self.cache), 2)
+        self.cache('a')
+        self.cache('b')
+        self.assertEqual(self.computed, ['a', 'b', 'c', 'b'])
+
+    def test_resize_to_zero_disables(self):
+        self.cache('a')
+        self.cache.resize(0)
+        self.cache('a')
+        self.cache('a')
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.computed, ['a', 'a', 'a'])
+
+    def test_errors_are_not_cached(self):
+        cache = LRUCache(lambda key: 1 / key)
+        for _ in range(2):
+            with self.assertRaises(ZeroDivisionError):
+                cache(0)
+        self.assertEqual(cache.take_stats(), (0, 2))
+
+    def test_hit_rate(self):
+        self.assertEqual(hit_rate(3, 1), 75.0)
+        self.assertEqual(hit_rate(0, 0), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
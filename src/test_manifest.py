@@ -0,0 +1,92 @@
+import os
+import unittest
+
+from manifest import *
+from tempdir import TempDirTestCase
+
+class TestBuildManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.root, 'docs')
+        os.makedirs(os.path.join(self.docs, 'blog'))
+        self.source = os.path.join(self.root, 'index.md')
+        self.template = os.path.join(self.root, 'template.html')
+        self.dest = os.path.join(self.docs, 'blog', 'index.html')
+        for path, text in [(self.source, '# Title'), (self.template, '{{ Content }}'), (self.dest, '<div></div>')]:
+            with open(path, 'w') as file:
+                file.write(text)
+        self.manifest_path = os.path.join(self.docs, MANIFEST_NAME)
+        self.options = {'basepath': '/', 'pretty': False}
+
+    def saved_manifest(self):
+        manifest = BuildManifest(self.manifest_path, self.options)
+        manifest.record(self.source, self.template, self.dest)
+        manifest.save()
+        return BuildManifest.load(self.manifest_path, self.options)
+
+    def test_unchanged_page_is_current(self):
+        manifest = self.saved_manifest()
+        self.assertTrue(manifest.is_current(self.source, self.template, self.dest))
+        self.assertEqual(manifest.reused, 1)
+
+    def test_changed_source_is_not_current(self):
+        manifest = self.saved_manifest()
+        with open(self.source, 'a') as file:
+            file.write('\n\nA new paragraph')
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+
+    def test_changed_template_is_not_current(self):
+        manifest = self.saved_manifest()
+        with open(self.template, 'w') as file:
+            file.write('<main>{{ Content }}</main>')
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+
+    def test_changed_options_invalidate_pages(self):
+        self.saved_manifest()
+        manifest = BuildManifest.load(self.manifest_path, {'basepath': '/site/', 'pretty': False})
+        self.assertEqual(manifest.pages, {os.path.join('blog', 'index.html'): None})
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+        self.assertIn(os.path.join('blog', 'index.html'), manifest.outputs())
+
+    def test_invalidated_pages_are_not_current_but_kept(self):
+        manifest = self.saved_manifest()
+        manifest.invalidate()
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+        self.assertIn(os.path.join('blog', 'index.html'), manifest.outputs())
+        self.assertEqual(manifest.prune(), [])
+
+    def stat(self, path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def test_reuses_hashes_of_inputs_with_the_same_stats(self):
+        manifest = BuildManifest(self.manifest_path, self.options)
+        manifest.file_stats = {self.source: self.stat(self.source)}
+        manifest.record(self.source, self.template, self.dest)
+        manifest.save()
+        manifest = BuildManifest.load(self.manifest_path, self.options)
+        self.assertEqual(list(manifest.stamps), [self.source])
+        # an edit that keeps the size & modification time of the source goes unnoticed, as the hash isn't computed again
+        stat = os.stat(self.source)
+        with open(self.source, 'w') as file:
+            file.write('# Other')
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        manifest.file_stats = {self.source: self.stat(self.source)}
+        self.assertTrue(manifest.is_current(self.source, self.template, self.dest))
+        # while any other stats mean it's hashed again
+        manifest = BuildManifest.load(self.manifest_path, self.options)
+        manifest.file_stats = {self.source: (stat.st_mtime_ns + 1, stat.st_size)}
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+
+    def test_prune_removes_pages_without_sources(self):
+        manifest = self.saved_manifest()
+        # nothing is seen during this build, as though the source was deleted
+        removed = manifest.prune()
+        self.assertEqual(removed, [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertFalse(os.path.exists(os.path.dirname(self.dest)))
+        self.assertTrue(os.path.exists(self.docs))
+
+
+if __name__ == "__main__":
+    unittest.main()
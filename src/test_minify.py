@@ -0,0 +1,86 @@
+import unittest
+
+from minify import *
+from htmlnode import LeafNode, ParentNode
+from conversions import markdown_to_html_node
+from template import Template
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_collapses_whitespace_between_tags(self):
+        html = '<!doctype html>\n<html>\n  <head>\n    <title>A   title</title>\n  </head>\n\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n'
+        self.assertEqual(
+            minify_html(html),
+            '<!doctype html><html><head><title>A title</title></head><body><article>{{ Content }}</article></body></html>',
+        )
+
+    def test_keeps_spaces_between_inline_tags(self):
+        self.assertEqual(minify_html('<p>\n  <b>bold</b>\n  <i>italic</i>\n</p>'), '<p><b>bold</b> <i>italic</i></p>')
+
+    def test_keeps_pre_and_code(self):
+        html = '<div>\n  <pre>\n  keep\n    this\n</pre>\n  <p>a <code>x  =  1</code>  b</p>\n</div>'
+        self.assertEqual(minify_html(html), '<div><pre>\n  keep\n    this\n</pre><p>a <code>x  =  1</code> b</p></div>')
+
+    def test_keeps_non_breaking_spaces(self):
+        self.assertEqual(minify_html('<p>a   b</p>'), '<p>a   b</p>')
+
+    def test_drops_comments(self):
+        html = '<head>\n  <!-- a note -->\n  <!--[if IE]><p>old</p><![endif]-->\n</head>'
+        self.assertEqual(minify_html(html), '<head><!-- a note --><!--[if IE]><p>old</p><![endif]--></head>')
+        self.assertEqual(minify_html(html, Minify(drop_comments=True)), '<head><!--[if IE]><p>old</p><![endif]--></head>')
+
+    def test_drops_optional_end_tags(self):
+        html = '<html><head><title>t</title></head><body><ul><li>a</li><li>b</li></ul><p>one</p><p>two</p><span><p>x</p></span><a><p>y</p></a>{{ Content }}</body></html>'
+        self.assertEqual(
+            minify_html(html, Minify(drop_end_tags=True)),
+            '<html><head><title>t</title><body><ul><li>a<li>b</ul><p>one<p>two</p><span><p>x</span><a><p>y</p></a>{{ Content }}',
+        )
+
+    def test_keeps_end_tags_before_comments(self):
+        self.assertEqual(minify_html('<body>x</body><!-- c -->', Minify(drop_end_tags=True)), '<body>x</body><!-- c -->')
+
+    def test_keeps_markup_like_text_in_scripts(self):
+        html = '<html>\n<head>\n  <script>\n    for (i = 0; i<n; i++) { s += i }\n  </script>\n</head>\n<body>\n  <p>x</p>\n</body>\n</html>\n'
+        self.assertEqual(
+            minify_html(html, Minify(drop_end_tags=True)),
+            '<html><head><script>\n    for (i = 0; i<n; i++) { s += i }\n  </script><body><p>x',
+        )
+
+    def test_parse_minify(self):
+        self.assertEqual(parse_minify([]), Minify())
+        self.assertEqual(parse_minify(['end-tags', 'comments']), Minify(drop_comments=True, drop_end_tags=True))
+        with self.assertRaises(ValueError):
+            parse_minify(['attributes'])
+
+
+class TestMinifiedRendering(unittest.TestCase):
+    def test_collapses_text_but_not_code(self):
+        node = ParentNode('div', [
+            ParentNode('p', [LeafNode(None, 'some\n  text'), LeafNode('code', 'a  b')]),
+            ParentNode('pre', [ParentNode('code', [LeafNode(None, 'x  =  1\n')])]),
+        ])
+        minifier = Minifier()
+        self.assertEqual(node.to_html(minifier=minifier), '<div><p>some text<code>a  b</code></p><pre><code>x  =  1\n</code></pre></div>')
+        self.assertEqual(minifier.saved, 2)
+
+    def test_drops_end_tags_by_what_follows(self):
+        node = markdown_to_html_node('# Title\n\nFirst  paragraph\n\n- one\n- two\n\nLast')
+        minifier = Minifier(Minify(drop_end_tags=True))
+        self.assertEqual(node.to_html(minifier=minifier), '<div><h1>Title</h1><p>First paragraph<ul><li>one<li>two</ul><p>Last</div>')
+        self.assertEqual(minifier.saved, len('</p></li></li></p>') + 1)
+
+    def test_drops_comments_from_text(self):
+        minifier = Minifier(Minify(drop_comments=True))
+        self.assertEqual(LeafNode(None, 'a <!-- é --> b').to_html(minifier=minifier), 'a b')
+        self.assertEqual(minifier.saved, len(' <!-- é -->'.encode()))
+
+    def test_template_and_content(self):
+        template = Template('<html>\n  <body>\n    <article>{{ Content }}</article>\n  </body>\n</html>\n', minify=Minify(drop_end_tags=True))
+        minifier = Minifier(template_minify := Minify(drop_end_tags=True))
+        html = template.render({'Content': markdown_to_html_node('One\n\nTwo')}, minifier=minifier)
+        self.assertEqual(html, '<html><body><article><div><p>One<p>Two</div></article>')
+        self.assertEqual(template.saved, len('\n  \n    \n  </body>\n</html>\n'))
+        self.assertEqual(minifier.saved, len('</p></p>'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import unittest
+
+from output import *
+from tempdir import TempDirTestCase
+
+class TestWriteIfChanged(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.path('index.html')
+
+    def test_writes_new_and_changed_files(self):
+        self.assertTrue(write_text_if_changed(self.page, '<p>café</p>'))
+        self.assertTrue(write_text_if_changed(self.page, '<p>tea</p>'))
+        self.assertEqual(self.read('index.html'), '<p>tea</p>')
+        self.assertEqual(os.listdir(self.root), ['index.html'])
+
+    def test_leaves_identical_files_untouched(self):
+        write_text_if_changed(self.page, '<p>hello</p>')
+        os.utime(self.page, ns=(0, 0))
+        self.assertFalse(write_text_if_changed(self.page, '<p>hello</p>'))
+        self.assertEqual(os.stat(self.page).st_mtime_ns, 0)
+
+    def test_compares_contents_of_the_same_size(self):
+        write_text_if_changed(self.page, '<p>hello</p>')
+        self.assertTrue(write_text_if_changed(self.page, '<p>jello</p>'))
+        self.assertEqual(self.read('index.html'), '<p>jello</p>')
+
+
+class TestAtomicOutput(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.path('index.html')
+        write_text_if_changed(self.page, '<p>hello</p>')
+        os.utime(self.page, ns=(0, 0))
+
+    def test_replaces_the_file_once_written(self):
+        with AtomicOutput(self.page) as file:
+            file.write('<p>hello')
+            file.write(' again</p>')
+        output = AtomicOutput(self.page)
+        with output as file:
+            file.write('<p>bye</p>')
+        self.assertTrue(output.written)
+        self.assertEqual(self.read('index.html'), '<p>bye</p>')
+        self.assertEqual(os.listdir(self.root), ['index.html'])
+
+    def test_leaves_identical_files_untouched(self):
+        output = AtomicOutput(self.page)
+        with output as file:
+            file.write('<p>hel')
+            file.write('lo</p>')
+        self.assertFalse(output.written)
+        self.assertEqual(os.stat(self.page).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(self.root), ['index.html'])
+
+    def test_keeps_the_old_file_if_writing_fails(self):
+        with self.assertRaises(ValueError):
+            with AtomicOutput(self.page) as file:
+                file.write('<p>half')
+                raise ValueError('the markdown was malformed')
+        self.assertEqual(self.read('index.html'), '<p>hello</p>')
+        self.assertEqual(os.listdir(self.root), ['index.html'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import shutil
+import threading
+import contextlib
+import unittest
+
+import pipeline
+from pipeline import *
+from tempdir import TempDirTestCase
+
+class TestPipelinedGeneration(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('template.html', '<title>{{ Title }}</title>{{ Content }}')
+        self.template_path = self.path('template.html')
+        self.jobs = []
+        for i in range(20):
+            self.write(f'content/{i}/index.md', f'# Page {i}\n\nSome *text* on page {i}.')
+            self.jobs.append((self.path(f'content/{i}/index.md'), self.template_path, self.path(f'docs/{i}/index.html'), '/', False, i % 7 == 0, None, None))
+
+    def read_outputs(self):
+        return [self.read(job[2]) for job in self.jobs]
+
+    def test_same_pages_and_logs_as_generate_page(self):
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            for job in self.jobs:
+                generate_page(*job)
+        expected, expected_log = self.read_outputs(), log.getvalue()
+        shutil.rmtree(self.path('docs'))
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            done = list(generate_pages_pipelined(self.jobs, threads=3, read_ahead=4, write_behind=2))
+        self.assertEqual(self.read_outputs(), expected)
+        self.assertEqual(log.getvalue(), expected_log)
+        self.assertEqual(sorted(job for job, written in done), sorted(self.jobs))
+        self.assertTrue(all(written for job, written in done))
+        # a second build writes nothing, as every page is the same
+        with contextlib.redirect_stdout(io.StringIO()):
+            done = list(generate_pages_pipelined(self.jobs))
+        self.assertFalse(any(written for job, written in done))
+
+    def test_reads_are_bounded(self):
+        reads = []
+        ahead = []
+        original = pipeline.read_page
+        lock = threading.Lock()
+
+        def counted_read(*args):
+            with lock:
+                reads.append(args[0])
+            return original(*args)
+
+        pipeline.read_page = counted_read
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i, (job, written) in enumerate(generate_pages_pipelined(self.jobs, threads=2, read_ahead=3, write_behind=2)):
+                    with lock:
+                        ahead.append(len(reads))
+        finally:
+            pipeline.read_page = original
+        # no more than read_ahead sources are read beyond the pages rendered so far, & write_behind pages are unwritten
+        for i, count in enumerate(ahead):
+            self.assertLessEqual(count, i + 1 + 3 + 2)
+
+    def test_errors_are_raised(self):
+        self.write('content/3/index.md', 'No title')
+        with self.assertRaises(Exception):
+            with contextlib.redirect_stdout(io.StringIO()):
+                list(generate_pages_pipelined(self.jobs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+
+import conversions
+import profiling
+from profiling import *
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_phases_are_exclusive(self):
+        profiler = Profiler()
+        # a clock read once as each phase is entered & exited: outer runs from 0 to 10, & inner from 1 to 4 within it
+        with mock.patch.object(profiling.time, 'perf_counter', side_effect=[0.0, 1.0, 4.0, 10.0]):
+            with profiler.phase('outer'):
+                with profiler.phase('inner'):
+                    pass
+        self.assertEqual(profiler.phases['outer'], [7.0, 1])
+        self.assertEqual(profiler.phases['inner'], [3.0, 1])
+
+    def test_disabled_profiler_collects_nothing(self):
+        profiler = Profiler(enabled=False)
+        with profiler.phase('static copy'):
+            pass
+        with profiler.page('./content/index.md'):
+            pass
+        profiler.install()
+        self.assertEqual(profiler.phases, {})
+        self.assertEqual(profiler.pages, {})
+        self.assertFalse(hasattr(conversions._text_to_textnodes, '__wrapped__'))
+
+    def test_install_and_uninstall(self):
+        original = conversions._text_to_textnodes
+        # text converted by an earlier test would otherwise be served from the inline caches, without being parsed
+        conversions.leaf_node_cache.clear()
+        conversions.textnode_cache.clear()
+        profiler = Profiler()
+        profiler.install()
+        try:
+            self.assertIs(conversions._text_to_textnodes.__wrapped__, original)
+            conversions.markdown_to_html_node('# Title\n\nSome **bold** text')
+        finally:
+            profiler.uninstall()
+        self.assertIs(conversions._text_to_textnodes, original)
+        self.assertEqual(profiler.phases['inline parsing'][1], 2)
+        self.assertEqual(profiler.phases['markdown_to_blocks'][1], 1)
+
+    def test_merge(self):
+        worker = Profiler()
+        with worker.page('./content/index.md'):
+            with worker.phase('inline parsing'):
+                pass
+        profiler = Profiler()
+        profiler.merge(worker.take())
+        profiler.merge({'phases': {'inline parsing': [1.0, 3]}, 'pages': {'./content/blog/tom/index.md': 1.0}, 'peak_memory': None})
+        self.assertEqual(profiler.phases['inline parsing'][1], 4)
+        self.assertEqual(worker.phases, {})
+        report = profiler.to_dict(slowest=1)
+        self.assertEqual(report['pages'], 2)
+        self.assertEqual(report['slowest_pages'], [{'path': './content/blog/tom/index.md', 'seconds': 1.0}])
+
+
+if __name__ == "__main__":
+    unittest.main()
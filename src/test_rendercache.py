@@ -0,0 +1,79 @@
+import os
+import time
+import unittest
+
+from rendercache import *
+from conversions import markdown_to_html_node
+from minify import Minify, Minifier
+from tempdir import TempDirTestCase
+
+class TestRenderCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = self.path('cache')
+        self.cache = RenderCache(self.directory, {'basepath': '/site/', 'pretty': False})
+        take_render_cache_stats()
+
+    def build(self, md, source_path='content/index.md'):
+        fragments = self.cache.load(source_path)
+        html = markdown_to_html_node(md, fragments).to_html(basepath='/site/')
+        self.cache.save(source_path, fragments)
+        return html
+
+    def test_same_html_as_without_cache(self):
+        md = '# Title\n\n[a post](/blog/tom) & ![tom](/tom.png)\n\n- one\n- two'
+        expected = markdown_to_html_node(md).to_html(basepath='/site/')
+        self.assertEqual(self.build(md), expected)
+        self.assertEqual(self.build(md), expected)
+        self.assertEqual(take_render_cache_stats(), (3, 3))
+
+    def test_only_edited_blocks_are_rendered(self):
+        self.build('# Title\n\nFirst\n\nSecond')
+        take_render_cache_stats()
+        self.assertEqual(self.build('# Title\n\nFirst, edited\n\nSecond'), '<div><h1>Title</h1><p>First, edited</p><p>Second</p></div>')
+        self.assertEqual(take_render_cache_stats(), (2, 1))
+
+    def test_options_are_part_of_the_key(self):
+        self.build('# Title')
+        other = RenderCache(self.directory, {'basepath': '/', 'pretty': False})
+        self.assertEqual(other.load('content/index.md').cached, {})
+        self.assertNotEqual(self.cache.load('content/index.md').cached, {})
+
+    def test_unreadable_file_is_empty(self):
+        path = self.cache.path_for('content/index.md')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as file:
+            file.write('{not json')
+        self.assertEqual(self.cache.load('content/index.md').cached, {})
+
+    def test_prune_evicts_least_recently_used(self):
+        for i in range(3):
+            self.build(f'# Page {i}', f'content/{i}/index.md')
+            path = self.cache.path_for(f'content/{i}/index.md')
+            os.utime(path, (time.time() + i, time.time() + i))
+        size = os.path.getsize(self.cache.path_for('content/0/index.md'))
+        self.cache.max_bytes = size * 2
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertFalse(os.path.exists(self.cache.path_for('content/0/index.md')))
+        self.assertTrue(os.path.exists(self.cache.path_for('content/2/index.md')))
+
+    def test_minified_fragments_count_what_they_saved(self):
+        md = '# Title\n\nOne  paragraph\n\n- one\n- two\n\n```\nkeep  this\n```'
+        minifier = Minifier(Minify(drop_end_tags=True))
+        expected = markdown_to_html_node(md).to_html(basepath='/site/', minifier=minifier)
+        for _ in range(2):
+            page_minifier = Minifier(Minify(drop_end_tags=True))
+            fragments = self.cache.load('content/index.md', minifier=page_minifier)
+            self.assertEqual(markdown_to_html_node(md, fragments).to_html(basepath='/site/', minifier=page_minifier), expected)
+            self.cache.save('content/index.md', fragments)
+            self.assertEqual(page_minifier.saved, minifier.saved)
+        self.assertEqual(take_render_cache_stats(), (4, 4))
+
+    def test_clear(self):
+        self.build('# Title')
+        self.cache.clear()
+        self.assertFalse(os.path.exists(self.directory))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import io
+import os
+import json
+import unittest
+
+from search import *
+from conversions import markdown_to_html_node, MarkdownStream
+from rendercache import RenderCache
+from tempdir import TempDirTestCase
+
+MD = '# The Hobbit\n\nIn a hole in the ground there lived a **hob**bit.\n\n- Bilbo\n- Frodo & Bilbo\n\n```\nsecond_breakfast()\n```'
+
+class TestPageText(TempDirTestCase):
+    def text_of(self, md):
+        text = PageText()
+        markdown_to_html_node(md, text=text)
+        return text
+
+    def test_positions_count_every_word(self):
+        text = self.text_of(MD)
+        self.assertEqual(text.positions['the'], [0, 6])
+        self.assertEqual(text.positions['hobbit'], [1, 11])
+        self.assertEqual(text.positions['bilbo'], [12, 14])
+        self.assertEqual(text.positions['second_breakfast'], [15])
+        # single letters count towards positions, but aren't indexed
+        self.assertNotIn('a', text.positions)
+        self.assertEqual(text.count, 16)
+        self.assertEqual(text.joined()['the'], '0,6')
+
+    def test_streamed_pages_have_the_same_text(self):
+        text = PageText()
+        MarkdownStream(io.StringIO(MD), text).to_html()
+        self.assertEqual(text.positions, self.text_of(MD).positions)
+
+    def test_cached_blocks_keep_their_text(self):
+        cache = RenderCache(self.path('cache'), {'basepath': '/'})
+        for _ in range(2):
+            fragments = cache.load('content/index.md')
+            text = PageText()
+            markdown_to_html_node(MD, fragments, text)
+            cache.save('content/index.md', fragments)
+            self.assertEqual(text.positions, self.text_of(MD).positions)
+        self.assertEqual(fragments.texts, fragments.cached_texts)
+
+    def test_shards_and_urls(self):
+        self.assertEqual(shard_for('static'), 'st')
+        self.assertEqual(shard_for('élan'), OTHER_SHARD)
+        self.assertEqual(url_for('index.html', '/site/'), '/site/')
+        self.assertEqual(url_for(os.path.join('blog', 'tom', 'index.html')), '/blog/tom/')
+
+
+class TestPostings(unittest.TestCase):
+    def test_without_pages(self):
+        postings = [f'{page_id},1' for page_id in range(100)]
+        self.assertEqual(without_pages(list(postings), {3, 50}), postings[:3] + postings[4:50] + postings[51:])
+        self.assertEqual(without_pages(postings[:4], {1, 2}), ['0,1', '3,1'])
+
+    def test_with_postings(self):
+        self.assertEqual(with_postings(['0,1', '2,5'], ['3,4']), ['0,1', '2,5', '3,4'])
+        self.assertEqual(with_postings(['0,1', '10,5'], ['2,4', '9,1']), ['0,1', '2,4', '9,1', '10,5'])
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = self.root
+
+    def page_text(self, rel_path, md):
+        text = PageText()
+        markdown_to_html_node(md, text=text)
+        return os.path.join(self.docs, rel_path), (md.split('\n')[0][2:], text.joined())
+
+    def update(self, pages, current=None):
+        index = SearchIndex.load(self.docs, '/site/')
+        return index.update(dict(self.page_text(*page) for page in pages), current)
+
+    def read_json(self, name):
+        return json.loads(self.read(os.path.join(SEARCH_DIR, name)))
+
+    def test_indexes_pages_into_shards(self):
+        self.assertEqual(self.update([('index.html', '# Home\n\nHobbits live here'), ('tom/index.html', '# Tom\n\nTom is no hobbit')])[:2], (2, 0))
+        self.assertEqual(self.read_json(SEARCH_PAGES), {'0': ['/site/', 'Home'], '1': ['/site/tom/', 'Tom']})
+        self.assertEqual(self.read_json('ho.json'), {'hobbit': ['1,4'], 'hobbits': ['0,1'], 'home': ['0,0']})
+        self.assertEqual(self.read_json('to.json'), {'tom': ['1,0,1']})
+
+    def test_updates_changed_pages_and_removes_deleted_ones(self):
+        self.update([('index.html', '# Home\n\nHobbits live here'), ('tom/index.html', '# Tom\n\nTom is no hobbit')])
+        indexed, removed, shards = self.update([('index.html', '# Home\n\nHobbits leave here')], current={'index.html'})
+        self.assertEqual((indexed, removed), (1, 1))
+        self.assertEqual(self.read_json(SEARCH_PAGES), {'0': ['/site/', 'Home']})
+        self.assertEqual(self.read_json('le.json'), {'leave': ['0,2']})
+        self.assertEqual(self.read_json('ho.json'), {'hobbits': ['0,1'], 'home': ['0,0']})
+        self.assertFalse(os.path.exists(self.path(os.path.join(SEARCH_DIR, 'li.json'))))
+        self.assertFalse(os.path.exists(self.path(os.path.join(SEARCH_DIR, 'to.json'))))
+        # ids aren't reused, so a page's id never changes while it exists
+        self.update([('ann/index.html', '# Ann\n\nAnother hobbit')])
+        self.assertEqual(self.read_json('ho.json')['hobbit'], ['2,2'])
+
+    def test_clear(self):
+        self.update([('index.html', '# Home\n\nHobbits live here')])
+        index = SearchIndex.load(self.docs)
+        self.assertFalse(index.is_empty())
+        index.clear()
+        self.assertTrue(index.is_empty())
+        self.assertEqual(os.listdir(self.path(SEARCH_DIR)), [])
+        self.assertIn(SEARCH_STATE, search_outputs(self.docs))
+
+
+if __name__ == "__main__":
+    unittest.main()
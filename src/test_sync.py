@@ -0,0 +1,54 @@
+import os
+import unittest
+
+from sync import *
+from tempdir import TempDirTestCase
+
+class TestSyncDir(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = self.path('static')
+        self.docs = self.path('docs')
+        self.write('static/styles.css', 'body {}')
+        self.write('static/images/tom.png', 'not really a png')
+
+    def test_copies_everything_at_first(self):
+        self.assertEqual(sync_dir(self.static, self.docs), (2, 0, 0))
+        self.assertEqual(self.read('docs/images/tom.png'), 'not really a png')
+
+    def test_copies_only_changed_files(self):
+        sync_dir(self.static, self.docs)
+        self.write('static/styles.css', 'body { color: red; }')
+        self.assertEqual(sync_dir(self.static, self.docs), (1, 0, 1))
+        self.assertEqual(self.read('docs/styles.css'), 'body { color: red; }')
+
+    def test_hash_comparison_ignores_mtime(self):
+        sync_dir(self.static, self.docs)
+        os.utime(self.path('static/styles.css'), (0, 0))
+        self.assertEqual(sync_dir(self.static, self.docs, use_hash=True), (0, 0, 2))
+        self.assertEqual(sync_dir(self.static, self.docs), (1, 0, 1))
+
+    def test_deletes_orphans_but_keeps_generated_pages(self):
+        sync_dir(self.static, self.docs)
+        self.write('docs/index.html', '<div></div>')
+        self.write('docs/blog/index.html', '<div></div>')
+        os.remove(self.path('static/images/tom.png'))
+        self.assertEqual(sync_dir(self.static, self.docs, keep={'index.html'}), (0, 2, 1))
+        self.assertTrue(os.path.exists(self.path('docs/index.html')))
+        self.assertFalse(os.path.exists(self.path('docs/blog')))
+        self.assertTrue(os.path.exists(self.path('docs/images')))
+
+    def test_hard_links(self):
+        sync_dir(self.static, self.docs, link=True)
+        from_stat = os.stat(self.path('static/styles.css'))
+        to_stat = os.stat(self.path('docs/styles.css'))
+        self.assertEqual(from_stat.st_ino, to_stat.st_ino)
+        self.assertEqual(sync_dir(self.static, self.docs, link=True), (0, 0, 2))
+
+    def test_missing_from_dir(self):
+        with self.assertRaises(ValueError):
+            sync_dir(self.path('missing'), self.docs)
+
+
+if __name__ == "__main__":
+    unittest.main()
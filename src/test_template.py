@@ -0,0 +1,55 @@
+import io
+import os
+import unittest
+
+from htmlnode import *
+from template import *
+from tempdir import TempDirTestCase
+
+class TestTemplate(TempDirTestCase):
+    def test_compiles_segments_and_slots(self):
+        template = Template('<title>{{ Title }}</title><article>{{ Content }}</article>')
+        self.assertEqual(template.segments, ['<title>', '</title><article>', '</article>'])
+        self.assertEqual(template.slots, ['Title', 'Content'])
+
+    def test_render(self):
+        template = Template('<title>{{ Title }}</title><article>{{ Content }}</article>{{ Content }}')
+        content = ParentNode('div', [LeafNode('b', 'bold')])
+        self.assertEqual(
+            template.render({'Title': 'Hello', 'Content': content}),
+            '<title>Hello</title><article><div><b>bold</b></div></article><div><b>bold</b></div>',
+        )
+
+    def test_write_matches_render(self):
+        template = Template('<title>{{ Title }}</title><article>{{ Content }}</article>')
+        values = {'Title': 'Hello', 'Content': ParentNode('div', [LeafNode('b', 'bold')])}
+        file = io.StringIO()
+        template.write(file, values)
+        self.assertEqual(file.getvalue(), template.render(values))
+
+    def test_pretty_content_is_indented_at_its_slot(self):
+        template = Template('<body>\n    <article>{{ Content }}</article>\n</body>')
+        self.assertEqual(template.depth_of('Content'), 2)
+        content = ParentNode('div', [LeafNode('h1', 'Hello'), LeafNode('p', 'text')])
+        self.assertEqual(
+            template.render({'Content': content}, pretty=True),
+            '<body>\n    <article><div>\n      <h1>Hello</h1>\n      <p>text</p>\n    </div></article>\n</body>',
+        )
+        self.assertEqual(template.render({'Content': content}), '<body>\n    <article><div><h1>Hello</h1><p>text</p></div></article>\n</body>')
+
+    def test_unknown_slots_are_untouched(self):
+        template = Template('<p>{{ Author }}</p>{{ Title }}')
+        self.assertEqual(template.render({'Title': 'Hello'}), '<p>{{ Author }}</p>Hello')
+
+    def test_load_template_caches_until_modified(self):
+        path = self.path('template.html')
+        self.write('template.html', '<p>{{ Content }}</p>')
+        template = load_template(path)
+        self.assertIs(load_template(path), template)
+        self.write('template.html', '<main>{{ Content }}</main>')
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1000000))
+        self.assertEqual(load_template(path).segments, ['<main>', '</main>'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+from watch import *
+from tempdir import TempDirTestCase
+
+class TestSnapshots(TempDirTestCase):
+    def test_detects_added_changed_and_deleted_files(self):
+        for rel_path in ['kept.md', 'nested/edited.md', 'removed.md']:
+            self.write(rel_path, '# Title')
+        kept, edited, removed = self.path('kept.md'), self.path('nested/edited.md'), self.path('removed.md')
+        old = snapshot([self.root])
+        self.assertEqual(sorted(old), sorted([kept, edited, removed]))
+
+        self.write('added.md', '# Title')
+        self.write('nested/edited.md', '# Title\n\nA longer file')
+        os.remove(removed)
+        changed, deleted = diff_snapshots(old, snapshot([self.root]))
+        self.assertEqual(changed, sorted([self.path('added.md'), edited]))
+        self.assertEqual(deleted, [removed])
+
+    def test_missing_paths_are_skipped(self):
+        self.assertEqual(snapshot([self.path('template.html'), self.path('content')]), {})
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is only available on Linux')
+class TestInotify(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.path('content'))
+        self.write('template.html', '{{ Content }}')
+        self.events = Inotify([self.path('content'), self.path('static'), self.path('template.html')])
+        self.addCleanup(self.events.close)
+
+    def test_wakes_on_changes_to_watched_paths(self):
+        self.assertFalse(self.events.wait(0))
+        self.write('content/index.md', '# Title')
+        self.assertTrue(self.events.wait(1))
+        self.write('template.html', '<main>{{ Content }}</main>')
+        self.assertTrue(self.events.wait(1))
+
+    def test_watches_directories_created_later(self):
+        os.makedirs(self.path('content/blog/tom'))
+        self.assertTrue(self.events.wait(1))
+        self.write('content/blog/tom/index.md', '# Tom')
+        self.assertTrue(self.events.wait(1))
+        os.makedirs(self.path('static'))
+        self.assertTrue(self.events.wait(1))
+        self.write('static/styles.css', 'body {}')
+        self.assertTrue(self.events.wait(1))
+
+    def test_ignores_other_files_beside_watched_paths(self):
+        os.makedirs(self.path('docs'))
+        self.write('docs/index.html', '<h1>Title</h1>')
+        self.write('notes.txt', 'unwatched')
+        self.assertFalse(self.events.wait(0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
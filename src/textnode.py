@@ -32,6 +32,8 @@ class TextType(Enum):
 class TextNode:
     '''A means of containing a block of text within some class and pairing it with minimal properties, which can then be translated to an HTMLNode
     '''
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -0,0 +1,229 @@
+import os
+import sys
+import time
+import errno
+import ctypes
+import select
+import struct
+import threading
+import functools
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# the inotify events a change to a watched file or directory may raise, from <sys/inotify.h>
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+# each event is a (watch descriptor, mask, cookie, length of name) header, followed by the name of the file it's about
+EVENT_HEADER = struct.Struct('iIII')
+
+def snapshot(paths):
+    '''Records the modification time and size of every file within the given files and directories
+
+    Returns a dict mapping each file path to a (mtime, size) tuple.
+    Paths that do not exist are left out, so that their creation is noticed as a change.
+    '''
+    files = {}
+
+    def scan(dir_path):
+        try:
+            entries = list(os.scandir(dir_path))
+        except FileNotFoundError:
+            # the directory was deleted between listing its parent and scanning it
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                scan(entry.path)
+            else:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+    for path in paths:
+        if os.path.isdir(path):
+            scan(path)
+        elif os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+def diff_snapshots(old, new):
+    '''Compares two snapshots, returning a (changed, deleted) tuple of sorted file path lists
+
+    Files that were added since the old snapshot count as changed.
+    '''
+    changed = sorted(path for path, stat in new.items() if old.get(path) != stat)
+    deleted = sorted(path for path in old if path not in new)
+    return changed, deleted
+
+
+class Inotify:
+    """
+    Waits on inotify for changes to files & the directories they're within, on Linux, without polling them
+
+    Every directory within each watched directory is watched, including those created later. Each watched path's
+    own directory is watched too (for changes to that path alone), so that a path that's created, deleted, or replaced
+    is noticed as well.
+
+    ...
+
+    Attributes
+    ----------
+    watches : dict
+        maps each watch descriptor to the directory it watches & the names of the files within it that matter
+        (or None, if every file does)
+
+    Methods
+    -------
+    wait(timeout)
+        Waits up to timeout seconds (or forever, if None) for any watched path to change, returning whether one did
+    close()
+        Stops watching
+    """
+
+    def __init__(self, paths):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self.__libc = ctypes.CDLL(None, use_errno=True)
+        self.__libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.__fd = self.__libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.__fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.watches = {}
+        try:
+            for path in paths:
+                path = os.path.abspath(path)
+                self._add(os.path.dirname(path), {os.path.basename(path)})
+                if os.path.isdir(path):
+                    self._add_tree(path)
+        except OSError:
+            self.close()
+            raise
+
+    def _add(self, dir_path, names=None):
+        wd = self.__libc.inotify_add_watch(self.__fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                # deleted since it was found; its deletion is an event of its parent
+                return
+            # e.g. ENOSPC, once the system's limit on watches is reached
+            raise OSError(error, os.strerror(error), dir_path)
+        # a directory watched twice keeps one descriptor, so the names that matter within it are merged
+        previous = self.watches.get(wd)
+        if previous is not None and (previous[1] is None or names is None):
+            names = None
+        elif previous is not None:
+            names = previous[1] | names
+        self.watches[wd] = (dir_path, names)
+
+    def _add_tree(self, dir_path):
+        self._add(dir_path)
+        try:
+            entries = list(os.scandir(dir_path))
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                self._add_tree(entry.path)
+
+    def wait(self, timeout=None):
+        changed = False
+        while select.select([self.__fd], [], [], timeout)[0]:
+            try:
+                data = os.read(self.__fd, 65536)
+            except BlockingIOError:
+                break
+            changed = self._handle(data) or changed
+            # whatever else arrived by now is read at once, rather than waiting again
+            timeout = 0
+        return changed
+
+    def _handle(self, data):
+        '''Handles the events read from inotify, watching any directories created within a watched one, & returns whether any matter
+        '''
+        changed = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0'))
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped, so any path may have changed
+                changed = True
+                continue
+            watched = self.watches.get(wd)
+            if watched is None:
+                continue
+            if mask & IN_IGNORED:
+                # the directory was deleted, or moved out of the way
+                del self.watches[wd]
+                continue
+            dir_path, names = watched
+            if names is not None and name not in names:
+                continue
+            changed = True
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(os.path.join(dir_path, name))
+        return changed
+
+    def close(self):
+        if self.__fd >= 0:
+            os.close(self.__fd)
+            self.__fd = -1
+
+
+def watch(paths, on_change, interval=0.05, max_interval=1.0):
+    '''Watches the given files and directories forever, calling on_change(changed, deleted) whenever any of them change
+
+    On Linux, inotify wakes the watcher as files change, so nothing is scanned while the site is idle. Elsewhere (or once
+    the system's limit on inotify watches is reached) the paths are polled instead: every interval seconds at first,
+    backing off to every max_interval seconds while nothing changes.
+    '''
+    previous = snapshot(paths)
+    try:
+        events = Inotify(paths)
+    except OSError:
+        events = None
+    delay = interval
+    while True:
+        if events is not None:
+            if not events.wait():
+                continue
+            # editors save in several steps (e.g. writing a temporary file, then renaming it over the original),
+            # so the rest of the steps are waited for, rather than rebuilding from a half-saved file
+            time.sleep(interval)
+            events.wait(0)
+        else:
+            time.sleep(delay)
+        current = snapshot(paths)
+        changed, deleted = diff_snapshots(previous, current)
+        if changed or deleted:
+            on_change(changed, deleted)
+            delay = interval
+        else:
+            delay = min(delay * 2, max_interval)
+        previous = current
+
+def serve(directory, port=8888):
+    '''Serves the given directory over HTTP from a background thread, returning the server
+    '''
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(('', port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server